@@ -1,15 +1,119 @@
-from supabase import create_client
+from concurrent.futures import ThreadPoolExecutor
+from postgrest import SyncPostgrestClient
+from postgrest.utils import SyncClient as PostgrestSession
+from supabase import Client, ClientOptions
+import asyncio
+import functools
+import httpx
 import os
+import threading
+
+DB_MAX_WORKERS = int(os.getenv("DB_MAX_WORKERS", "8"))
+
+# The supabase client is synchronous. Handlers run its calls on this bounded
+# pool so one slow request doesn't stall every other chat on the event loop.
+_db_executor = ThreadPoolExecutor(
+    max_workers=DB_MAX_WORKERS,
+    thread_name_prefix="supabase",
+)
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _pool_limits() -> httpx.Limits:
+    """Connection pool limits, sized so every executor thread can hold a connection"""
+    return httpx.Limits(
+        max_connections=int(
+            os.getenv("SUPABASE_POOL_MAX_CONNECTIONS", str(DB_MAX_WORKERS * 2))
+        ),
+        max_keepalive_connections=int(
+            os.getenv("SUPABASE_POOL_MAX_KEEPALIVE", str(DB_MAX_WORKERS))
+        ),
+        keepalive_expiry=float(os.getenv("SUPABASE_POOL_KEEPALIVE_EXPIRY", "60")),
+    )
+
+
+class _PooledPostgrestClient(SyncPostgrestClient):
+    """PostgREST client whose HTTP session uses our pool settings"""
+
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+        return PostgrestSession(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            verify=verify,
+            proxy=proxy,
+            follow_redirects=True,
+            http2=os.getenv("SUPABASE_HTTP2", "1") == "1",
+            limits=_pool_limits(),
+        )
+
+
+class _PooledClient(Client):
+    @staticmethod
+    def _init_postgrest_client(
+        rest_url, headers, schema, timeout=120, verify=True, proxy=None
+    ):
+        return _PooledPostgrestClient(
+            rest_url,
+            headers=headers,
+            schema=schema,
+            timeout=timeout,
+            verify=verify,
+            proxy=proxy,
+        )
+
+
+def get_supabase_client() -> Client:
+    """Return the process-wide Supabase client, creating it on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            supabase_url = os.getenv("SUPABASE_URL")
+            supabase_key = os.getenv("SUPABASE_KEY")
+            options = ClientOptions(
+                postgrest_client_timeout=float(os.getenv("SUPABASE_TIMEOUT", "120"))
+            )
+            _client = _PooledClient.create(supabase_url, supabase_key, options)
+            print("Supabase client created successfully")
+    return _client
 
 
 class BaseManager:
     def __init__(self):
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_KEY")
-
         try:
-            self.supabase = create_client(supabase_url, supabase_key)
-            print("Supabase client created successfully")
+            self.supabase = get_supabase_client()
         except Exception as e:
             print(f"Error creating Supabase client: {e}")
             raise
+
+        self.aio = AsyncManagerProxy(self)
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking database call on the executor and await its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _db_executor, functools.partial(func, *args, **kwargs)
+        )
+
+
+class AsyncManagerProxy:
+    """
+    Awaitable view of a manager with the same method names.
+    `await manager.aio.get_player(id)` runs `manager.get_player(id)` off the event loop.
+    """
+
+    def __init__(self, manager: BaseManager):
+        self._manager = manager
+
+    def __getattr__(self, name):
+        method = getattr(self._manager, name)
+        if not callable(method):
+            raise AttributeError(f"{name} is not a manager method")
+
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs):
+            return await self._manager.run(method, *args, **kwargs)
+
+        return wrapper
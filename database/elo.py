@@ -1,9 +1,10 @@
 from dataclasses import dataclass
-from typing import List, Dict, Tuple
+from typing import Dict, Iterator, List, Tuple
 import math
 import logging
 
 from database.base import BaseManager
+from database.queries import RATED_GAME_COLUMNS, RATED_PARTICIPANT_COLUMNS
 
 
 @dataclass
@@ -13,6 +14,8 @@ class EloConfig:
     max_k: int = 48
     default_rating: int = 1200
     goal_difference_factor: float = 0.1
+    # A full ratings snapshot is stored after every this many rated games
+    snapshot_interval: int = 50
 
 
 class EloDBManager(BaseManager):
@@ -30,6 +33,24 @@ class EloDBManager(BaseManager):
         current_ratings: Dict[int, int],
     ) -> Dict[int, int]:
         """Calculate ELO adjustments for all players in a game"""
+        changes = self.calculate_game_changes(
+            team_a_players, team_b_players, team_a_score, team_b_score, current_ratings
+        )
+        return {change["player_id"]: change["rating_after"] for change in changes}
+
+    def calculate_game_changes(
+        self,
+        team_a_players: List[Dict],
+        team_b_players: List[Dict],
+        team_a_score: int,
+        team_b_score: int,
+        current_ratings: Dict[int, int],
+    ) -> List[Dict]:
+        """
+        Calculate the rating change of every registered player in a game.
+        Each change has player_id, rating_before, rating_after, k_factor
+        and expected_score.
+        """
         # Count external players (negative IDs)
         num_external = len(
             [p for p in team_a_players + team_b_players if p["player_id"] < 0]
@@ -56,40 +77,36 @@ class EloDBManager(BaseManager):
             team_a_score, team_b_score
         )
 
-        new_ratings = {}
+        changes = []
+        for players, actual_score, exp_score in [
+            (team_a_players, actual_score_a, exp_score_a),
+            (team_b_players, actual_score_b, exp_score_b),
+        ]:
+            for player in players:
+                if player["player_id"] <= 0:  # Only process registered players
+                    continue
 
-        # Process Team A registered players
-        for player in team_a_players:
-            if player["player_id"] > 0:  # Only process registered players
                 k_factor = self._calculate_k_factor(
                     player.get("games_played", 0), num_external
                 )
-                rating_change = (
-                    k_factor * goal_diff_factor * (actual_score_a - exp_score_a)
-                )
+                rating_change = k_factor * goal_diff_factor * (actual_score - exp_score)
                 current_rating = current_ratings.get(
                     player["player_id"], self.config.default_rating
                 )
-                new_ratings[player["player_id"]] = round(current_rating + rating_change)
-
-        # Process Team B registered players
-        for player in team_b_players:
-            if player["player_id"] > 0:  # Only process registered players
-                k_factor = self._calculate_k_factor(
-                    player.get("games_played", 0), num_external
-                )
-                rating_change = (
-                    k_factor * goal_diff_factor * (actual_score_b - exp_score_b)
-                )
-                current_rating = current_ratings.get(
-                    player["player_id"], self.config.default_rating
+                changes.append(
+                    {
+                        "player_id": player["player_id"],
+                        "rating_before": current_rating,
+                        "rating_after": round(current_rating + rating_change),
+                        "k_factor": k_factor,
+                        "expected_score": exp_score,
+                    }
                 )
-                new_ratings[player["player_id"]] = round(current_rating + rating_change)
 
         print(f"Current ratings: {current_ratings}")
-        print(f"New ratings: {new_ratings}")
+        print(f"Rating changes: {changes}")
 
-        return new_ratings
+        return changes
 
     def _calculate_team_rating(
         self, players: List[Dict], current_ratings: Dict[int, int]
@@ -141,12 +158,124 @@ class EloDBManager(BaseManager):
         # Reduce K-factor for external players
         return base_k * (0.5**num_external)
 
+    def write_ratings(
+        self,
+        ratings: Dict[int, int],
+        history: List[Dict] | None = None,
+        game: Dict | None = None,
+    ) -> None:
+        """
+        Write new ratings for many players in a single request, together with
+        their rating_history rows. With the rated `game` (id and played_at) the
+        function also stores a rating_snapshots checkpoint after it once
+        snapshot_interval games have been played since the previous one.
+        """
+        if not ratings:
+            return
+
+        self.supabase.rpc(
+            "apply_elo_ratings",
+            {
+                "ratings": [
+                    {"id": player_id, "elo_rating": rating}
+                    for player_id, rating in ratings.items()
+                ],
+                "history": history or [],
+                "snapshot_game": (
+                    {"game_id": game["id"], "played_at": game["played_at"]}
+                    if game
+                    else None
+                ),
+                "snapshot_interval": self.config.snapshot_interval,
+            },
+        ).execute()
+
+    def write_rating_history(self, history: List[Dict], chunk_size: int = 1000):
+        """Bulk upsert rating_history rows, used when replaying everything"""
+        for start in range(0, len(history), chunk_size):
+            self.supabase.table("rating_history").upsert(
+                history[start : start + chunk_size],
+                on_conflict="player_id,game_id",
+            ).execute()
+
+    def write_snapshots(self, snapshots: List[Dict]) -> None:
+        if snapshots:
+            self.supabase.table("rating_snapshots").upsert(snapshots).execute()
+
+    def get_rating_history(self, player_id: int) -> List[Dict]:
+        """Per-game rating changes of a player, oldest first"""
+        result = (
+            self.supabase.table("rating_history")
+            .select("game_id, rating_before, rating_after, k_factor, expected_score")
+            .eq("player_id", player_id)
+            .order("game_id")
+            .execute()
+        )
+        return result.data
+
+    def get_latest_snapshot(self, before: str | None = None) -> Dict | None:
+        """Most recent ratings checkpoint, optionally taken before a played_at"""
+        query = self.supabase.table("rating_snapshots").select("*")
+        if before:
+            query = query.lt("played_at", before)
+        result = query.order("played_at", desc=True).limit(1).execute()
+        if not result.data:
+            return None
+
+        snapshot = result.data[0]
+        snapshot["ratings"] = {int(k): v for k, v in snapshot["ratings"].items()}
+        return snapshot
+
+    def iter_rated_games(
+        self, page_size: int = 1000, after: Dict | None = None
+    ) -> Iterator[Dict]:
+        """
+        Stream every game with its game_players rows, oldest first.
+        `after` is a snapshot (or game) row: only later games are returned.
+        """
+        start = 0
+        while True:
+            query = self.supabase.table("games").select(
+                f"{RATED_GAME_COLUMNS}, game_players({RATED_PARTICIPANT_COLUMNS})"
+            )
+            if after:
+                query = self._played_after(query, after)
+            result = (
+                query.order("played_at")
+                .order("id")
+                .range(start, start + page_size - 1)
+                .execute()
+            )
+            yield from result.data
+            if len(result.data) < page_size:
+                return
+            start += page_size
+
+    @staticmethod
+    def _played_after(query, after: Dict):
+        """Filter a games query to games after `after` in (played_at, id) order"""
+        played_at, game_id = after["played_at"], after["game_id"]
+        return query.or_(
+            f'played_at.gt."{played_at}",'
+            f'and(played_at.eq."{played_at}",id.gt.{game_id})'
+        )
+
+    def get_all_player_ids(self) -> List[int]:
+        result = self.supabase.table("players").select("id").execute()
+        return [p["id"] for p in result.data]
+
     def process_game_ratings(self, game_id: int) -> bool:
         """Process ELO rating changes for a completed game"""
         try:
-            # Fetch game data
+            # Fetch the game, its participants and their ratings in one request
             result = (
-                self.supabase.table("games").select("*").eq("id", game_id).execute()
+                self.supabase.table("games")
+                .select(
+                    f"{RATED_GAME_COLUMNS}, "
+                    f"game_players({RATED_PARTICIPANT_COLUMNS}, players(elo_rating))"
+                )
+                .eq("id", game_id)
+                .execute()
             )
             game = result.data[0] if result.data else None
             if not game:
@@ -155,14 +284,12 @@ class EloDBManager(BaseManager):
 
             print(f"Date: {game['played_at']}")
 
-            # Fetch player data
-            result = (
-                self.supabase.table("game_players")
-                .select("*")
-                .eq("game_id", game_id)
-                .execute()
-            )
-            players_data = result.data if result.data else []
+            players_data = game.pop("game_players") or []
+            current_ratings = {
+                p["player_id"]: p["players"]["elo_rating"]
+                for p in players_data
+                if p["player_id"] > 0 and p.get("players")
+            }
 
             # Create virtual players for external players
             external_players = []
@@ -194,20 +321,6 @@ class EloDBManager(BaseManager):
             team_a = [p for p in players_data if p["team"] == "A"]
             team_b = [p for p in players_data if p["team"] == "B"]
 
-            # Get current ratings for registered players
-            all_player_ids = [
-                p["player_id"] for p in players_data if p["player_id"] > 0
-            ]
-            result = (
-                self.supabase.table("players")
-                .select("id,elo_rating")
-                .in_("id", all_player_ids)
-                .execute()
-            )
-            current_ratings = (
-                {p["id"]: p["elo_rating"] for p in result.data} if result.data else {}
-            )
-
             # Add ratings for external players
             for external_id in external_players:
                 current_ratings[external_id] = (
@@ -215,20 +328,21 @@ class EloDBManager(BaseManager):
                 )
 
             # Calculate new ratings
-            new_ratings = self.calculate_game_adjustments(
+            changes = self.calculate_game_changes(
                 team_a,
                 team_b,
                 game["score_team_a"],
                 game["score_team_b"],
                 current_ratings,
             )
+            new_ratings = {c["player_id"]: c["rating_after"] for c in changes}
 
-            # Update ratings in database (only for registered players)
-            for player_id, new_rating in new_ratings.items():
-                if player_id > 0:  # Only update ratings for registered players
-                    self.supabase.table("players").update(
-                        {"elo_rating": new_rating}
-                    ).eq("id", player_id).execute()
+            # Update ratings, their history and any snapshot due in one request
+            self.write_ratings(
+                new_ratings,
+                history=[dict(change, game_id=game_id) for change in changes],
+                game=game,
+            )
 
             print("--- Ratings updated ---\n\n")
 
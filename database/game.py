@@ -4,6 +4,9 @@ from database.base import BaseManager
 from models.game import SoccerGame
 from models.game_player import GamePlayer
 
+# PostgREST handles large JSON arrays fine, but keep history imports bounded
+PARTICIPATION_CHUNK_SIZE = 500
+
 
 class GameDBManager(BaseManager):
     def save_game(
@@ -37,17 +40,65 @@ class GameDBManager(BaseManager):
             print(f"Error saving game: {e}")
             return None
 
+    def insert_games(self, games_data: list) -> list:
+        """Insert many games in one request and return their ids in the same order"""
+        if not games_data:
+            return []
+        result = self.supabase.table("games").insert(games_data).execute()
+        return [game["id"] for game in result.data]
+
     def _save_player_participations(self, game_id, players_data):
-        """Helper method to save player participations"""
-        for player_data in players_data:
-            participation_data = {
+        """Helper method to save player participations in one bulk request"""
+        participations = [
+            {
                 "game_id": game_id,
                 "player_id": player_data["id"],
                 "team": player_data["team"],
                 "was_captain": player_data["was_captain"],
                 "was_mvp": player_data["was_mvp"],
             }
-            self.supabase.table("game_players").insert(participation_data).execute()
+            for player_data in players_data
+        ]
+        failed = self.insert_participations(participations)
+        if failed:
+            print(
+                f"Failed to save {len(failed)} participations for game {game_id}: "
+                f"{[row['player_id'] for row in failed]}"
+            )
+        return failed
+
+    def insert_participations(
+        self, participations, chunk_size=PARTICIPATION_CHUNK_SIZE
+    ) -> list:
+        """
+        Bulk insert game_players rows, one request per chunk.
+        A failed chunk is retried row by row so only the bad rows are reported.
+        Returns the list of rows that could not be saved.
+        """
+        failed = []
+        for start in range(0, len(participations), chunk_size):
+            chunk = participations[start : start + chunk_size]
+            try:
+                self.supabase.table("game_players").insert(chunk).execute()
+            except Exception as e:
+                print(f"Error saving participation chunk, retrying per row: {e}")
+                for row in chunk:
+                    try:
+                        self.supabase.table("game_players").insert(row).execute()
+                    except Exception as row_error:
+                        print(
+                            f"Error saving participation for player "
+                            f"{row['player_id']}: {row_error}"
+                        )
+                        failed.append(row)
+        return failed
+
+    def delete_games(self, game_ids: list) -> None:
+        """Delete games and their participations"""
+        if not game_ids:
+            return
+        self.supabase.table("game_players").delete().in_("game_id", game_ids).execute()
+        self.supabase.table("games").delete().in_("id", game_ids).execute()
 
     def update_game_score(self, game_id, score_a, score_b):
         """Update the score for a game"""
@@ -60,49 +111,80 @@ class GameDBManager(BaseManager):
             print(f"Error updating game score: {e}")
             return False
 
-    def save_active_game_players(self, chat_id: str, players: list):
-        """Save just the players in an active game"""
+    def save_active_game(self, chat_id, snapshot: dict):
+        """
+        Store the full state of an active game (SoccerGame.to_snapshot).
+        The row is only replaced by a newer version, see active_games.sql
+        """
         game_state = {
             "chat_id": str(chat_id),
-            "player_ids": [p.id for p in players],
+            "player_ids": [player_id for player_id, _ in snapshot["players"]],
+            "state": snapshot,
+            "version": snapshot["version"],
             "updated_at": datetime.utcnow().isoformat(),
         }
 
         try:
-            self.supabase.table("active_games").upsert(game_state).execute()
+            result = self.supabase.rpc(
+                "save_active_game", {"game": game_state}
+            ).execute()
+            if result.data is False:
+                print(
+                    f"Skipped saving version {snapshot['version']} of the game "
+                    f"in chat {chat_id}, a newer one is stored"
+                )
         except Exception as e:
-            print(f"Error saving game players: {e}")
+            print(f"Error saving active game: {e}")
 
     def load_active_games(self) -> dict:
-        """Load active games and reconstruct GamePlayer objects"""
+        """
+        Load active games keyed by chat id.
+        Games saved with a full snapshot resume in whatever phase they were in;
+        older rows only have player_ids and come back as waiting games. The
+        names for all of those are fetched in one query, so restore takes two
+        requests however many groups have a game open.
+        """
         try:
             result = self.supabase.table("active_games").select("*").execute()
             games = {}
 
-            for game_data in result.data:
-                game = SoccerGame()
-                if game_data["player_ids"]:
-                    players_result = (
-                        self.supabase.table("players")
-                        .select("id, display_name")
-                        .in_("id", game_data["player_ids"])
-                        .execute()
-                    )
-
-                    for player_info in players_result.data:
-                        game_player = GamePlayer(
-                            id=player_info["id"],
-                            telegram_user=None,
-                            display_name=player_info["display_name"],
-                        )
-                        game.players.append(game_player)
+            legacy_rows = [row for row in result.data if not row.get("state")]
+            display_names = self._get_display_names(
+                {pid for row in legacy_rows for pid in row["player_ids"] or ()}
+            )
 
-                games[game_data["chat_id"]] = game
+            for game_data in result.data:
+                if game_data.get("state"):
+                    game = SoccerGame.from_snapshot(game_data["state"])
+                else:
+                    game = SoccerGame()
+                    for player_id in game_data["player_ids"] or ():
+                        if player_id in display_names:
+                            game.add_player(
+                                GamePlayer(
+                                    id=player_id,
+                                    telegram_user=None,
+                                    display_name=display_names[player_id],
+                                )
+                            )
+                games[int(game_data["chat_id"])] = game
             return games
         except Exception as e:
             print(f"Error loading active games: {e}")
             return {}
 
+    def _get_display_names(self, player_ids) -> dict:
+        """{player_id: display_name} for the given players, in one request"""
+        if not player_ids:
+            return {}
+        result = (
+            self.supabase.table("players")
+            .select("id, display_name")
+            .in_("id", list(player_ids))
+            .execute()
+        )
+        return {p["id"]: p["display_name"] for p in result.data}
+
     def remove_active_game(self, chat_id):
         """Remove game from active games when completed"""
         try:
@@ -1,74 +1,187 @@
 from datetime import datetime
+import os
 from database.base import BaseManager
+from database.queries import (
+    LeaderboardRow,
+    PlayerStatsRow,
+    columns,
+    decode,
+    decode_one,
+)
 from models.player import Player
+from services.player_directory import PlayerDirectory
 
 
 class PlayerDBManager(BaseManager):
+    def __init__(self):
+        super().__init__()
+        self.directory = PlayerDirectory(
+            ttl=float(os.getenv("PLAYER_DIRECTORY_TTL", "3600")),
+            max_size=int(os.getenv("PLAYER_DIRECTORY_SIZE", "5000")),
+        )
+
+    def load_directory(self) -> None:
+        """Fill the player directory with every registered player"""
+        try:
+            display_names = self.get_display_names()
+            self.directory.load(display_names)
+            print(f"Loaded {len(display_names)} players into the directory")
+        except Exception as e:
+            print(f"Error loading player directory: {e}")
+
     def create_player(self, user) -> Player | None:
         """Create or update player record"""
         try:
             player_data = user.to_dict()
             result = self.supabase.table("players").upsert(player_data).execute()
-            return Player.from_db(result.data[0]) if result.data else None
+            if not result.data:
+                return None
+
+            player = Player.from_db(result.data[0])
+            self.directory.put(player.id, player.display_name)
+            return player
         except Exception as e:
             print(f"Error saving player: {e}")
             return None
 
-    def get_player(self, player_id) -> Player | None:
+    def get_player(self, player_id) -> PlayerStatsRow | None:
         """Get player statistics"""
         try:
             result = (
-                self.supabase.table("players").select("*").eq("id", player_id).execute()
+                self.supabase.table("players")
+                .select(columns(PlayerStatsRow))
+                .eq("id", player_id)
+                .execute()
             )
-            return Player.from_db(result.data[0]) if result.data else None
+            return decode_one(PlayerStatsRow, result.data)
         except Exception as e:
             print(f"Error getting player stats: {e}")
             return None
 
-    def get_player_by_display_name(self, player_display_name) -> Player | None:
+    def get_player_by_display_name(self, player_display_name) -> PlayerStatsRow | None:
         """Get player statistics"""
         try:
             result = (
                 self.supabase.table("players")
-                .select("*")
+                .select(columns(PlayerStatsRow))
                 .eq("display_name", player_display_name)
                 .execute()
             )
-            return Player.from_db(result.data[0]) if result.data else None
+            return decode_one(PlayerStatsRow, result.data)
         except Exception as e:
             print(f"Error getting player stats: {e}")
             return None
 
-    def get_leaderboard(self, min_games=5) -> list[Player]:
+    def get_all_players(self) -> list[Player]:
+        """Get every registered player"""
+        result = self.supabase.table("players").select("*").execute()
+        return [Player.from_db(player) for player in result.data]
+
+    def get_display_names(self) -> dict:
+        """{player_id: display_name} for every registered player"""
+        result = self.supabase.table("players").select("id, display_name").execute()
+        return {p["id"]: p["display_name"] for p in result.data}
+
+    def get_player_aliases(self) -> list[dict]:
+        """Every row of the player_aliases table (alias, player_id)"""
+        result = (
+            self.supabase.table("player_aliases").select("alias, player_id").execute()
+        )
+        return result.data
+
+    def upsert_aliases(self, aliases: dict) -> None:
+        """Store many {alias: player_id} entries in one request"""
+        if aliases:
+            self.supabase.table("player_aliases").upsert(
+                [
+                    {"alias": alias, "player_id": player_id}
+                    for alias, player_id in aliases.items()
+                ]
+            ).execute()
+
+    def upsert_players(self, players: list[Player]) -> None:
+        """Write many player records in one request"""
+        if players:
+            self.supabase.table("players").upsert(
+                [player.to_dict() for player in players]
+            ).execute()
+
+    def get_leaderboard(self, min_games=5, limit=5) -> list[LeaderboardRow]:
         """Get top players by ELO rating"""
         result = (
             self.supabase.table("players")
-            .select("*")
+            .select(columns(LeaderboardRow))
             .gte("games_played", min_games)
             .order("elo_rating", desc=True)
-            .limit(5)
+            .limit(limit)
             .execute()
         )
 
-        return [Player.from_db(player) for player in result.data]
+        return decode(LeaderboardRow, result.data)
 
-    def update_player_stats(self, score_team_a, score_team_b, players_data) -> None:
-        """Update statistics for all players in a game"""
+    def update_player_stats(
+        self, score_team_a, score_team_b, players_data, atomic=False
+    ) -> None:
+        """
+        Update statistics for all players in a game.
+        Fetches every participant in one request and writes all new stats back
+        in one bulk upsert. With atomic=True the increments are applied
+        server-side by the apply_game_stats function (database/sql).
+        """
+        if not players_data:
+            return
+
+        if atomic:
+            self._update_player_stats_rpc(score_team_a, score_team_b, players_data)
+            return
+
+        player_ids = [player_data["id"] for player_data in players_data]
+        try:
+            result = (
+                self.supabase.table("players")
+                .select("*")
+                .in_("id", player_ids)
+                .execute()
+            )
+        except Exception as e:
+            print(f"Error fetching players for stats update: {e}")
+            return
+
+        players = {row["id"]: Player.from_db(row) for row in result.data}
+
+        updates = []
         for player_data in players_data:
-            player = self.get_player(player_data["id"])
+            player = players.get(player_data["id"])
             if not player:
                 continue
 
             new_stats = self._calculate_player_stats(
                 player, player_data, score_team_a, score_team_b
             )
+            new_stats["id"] = player.id
+            updates.append(new_stats)
+
+        if not updates:
+            return
 
-            try:
-                self.supabase.table("players").update(new_stats).eq(
-                    "id", player_data["id"]
-                ).execute()
-            except Exception as e:
-                print(f"Error updating stats for player {player_data['id']}: {e}")
+        try:
+            self.supabase.table("players").upsert(updates).execute()
+        except Exception as e:
+            print(f"Error updating stats for players {player_ids}: {e}")
+
+    def _update_player_stats_rpc(self, score_team_a, score_team_b, players_data):
+        """Apply the stat increments for a game in a single transaction"""
+        try:
+            self.supabase.rpc(
+                "apply_game_stats",
+                {
+                    "score_team_a": score_team_a,
+                    "score_team_b": score_team_b,
+                    "players_data": players_data,
+                },
+            ).execute()
+        except Exception as e:
+            print(f"Error applying game stats: {e}")
 
     def _calculate_player_stats(
         self, player: Player, player_data: dict, score_team_a: int, score_team_b: int
@@ -119,7 +232,7 @@ class PlayerDBManager(BaseManager):
         return new_stats
 
     def get_player_display_name(self, player_id) -> str | None:
-        """Get player statistics"""
+        """Get a player's display name from the database and cache it"""
         try:
             result = (
                 self.supabase.table("players")
@@ -127,7 +240,9 @@ class PlayerDBManager(BaseManager):
                 .eq("id", player_id)
                 .execute()
             )
-            return result.data[0]["display_name"]
+            display_name = result.data[0]["display_name"]
+            self.directory.put(player_id, display_name)
+            return display_name
         except Exception as e:
             print(f"Error getting player stats: {e}")
             return None
@@ -0,0 +1,59 @@
+"""
+Column projections for the hot read paths.
+Each row type lists exactly the columns its caller uses; `columns()` builds
+the select string from the fields and `decode()` turns PostgREST rows into
+lightweight tuples, so no query downloads or parses a full players row.
+"""
+
+from typing import NamedTuple
+
+
+class PlayerStatsRow(NamedTuple):
+    """Everything /stats and registration show about a player"""
+
+    id: int
+    display_name: str
+    elo_rating: int
+    games_played: int
+    games_won: int
+    games_lost: int
+    games_drawn: int
+    current_streak: int
+    worst_streak: int
+    best_unbeaten_streak: int
+    times_captain: int
+    times_mvp: int
+
+
+class LeaderboardRow(NamedTuple):
+    id: int
+    display_name: str
+    elo_rating: int
+    games_played: int
+    games_won: int
+    games_lost: int
+    games_drawn: int
+
+
+# Game fields the rating calculation reads
+RATED_GAME_COLUMNS = (
+    "id, played_at, score_team_a, score_team_b, "
+    "team_a_external_count, team_b_external_count"
+)
+# Participant fields the rating calculation reads. game_players has no
+# games_played column, so the K-factor keeps using its default for it.
+RATED_PARTICIPANT_COLUMNS = "player_id, team"
+
+
+def columns(row_type) -> str:
+    """Select string for a row type: 'id, display_name, ...'"""
+    return ", ".join(row_type._fields)
+
+
+def decode(row_type, rows: list) -> list:
+    return [row_type(**row) for row in rows]
+
+
+def decode_one(row_type, rows: list):
+    """First row decoded, or None if the query returned nothing"""
+    return row_type(**rows[0]) if rows else None
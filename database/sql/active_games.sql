@@ -0,0 +1,34 @@
+-- Full snapshot of each active game (models.game.SoccerGame.to_snapshot),
+-- written by services.game_state_writer.GameStateWriter.
+-- player_ids is kept for rows saved before snapshots existed.
+alter table active_games add column if not exists state jsonb;
+alter table active_games add column if not exists version bigint not null default 0;
+
+-- Upsert of one active_games row that never replaces a newer version, so a
+-- write that finishes late can't roll the game back. Version 1 is the first
+-- write of a new game and always applies, even over a row left behind by an
+-- earlier game in the chat.
+-- game: {"chat_id": "...", "player_ids": [...], "state": {...},
+--        "version": 7, "updated_at": "..."}
+-- Returns false when the row already had a newer version.
+create or replace function save_active_game(game jsonb) returns boolean
+language plpgsql
+as $$
+declare
+    written integer;
+begin
+    insert into active_games (chat_id, player_ids, state, version, updated_at)
+    select r.chat_id, r.player_ids, r.state, r.version, r.updated_at
+    from jsonb_populate_record(null::active_games, game) as r
+    on conflict (chat_id) do update
+    set
+        player_ids = excluded.player_ids,
+        state = excluded.state,
+        version = excluded.version,
+        updated_at = excluded.updated_at
+    where active_games.version < excluded.version or excluded.version = 1;
+
+    get diagnostics written = row_count;
+    return written > 0;
+end;
+$$;
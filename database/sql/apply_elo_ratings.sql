@@ -0,0 +1,77 @@
+-- Writes the ratings computed by EloDBManager for many players at once,
+-- together with their per-game rating_history rows, in one transaction.
+-- When snapshot_game is given and snapshot_interval games (counting this one)
+-- have been played since the latest rating_snapshots row, a checkpoint of
+-- every player's new rating is stored for that game as well.
+--
+-- ratings:       [{"id": 1, "elo_rating": 1216}, ...]
+-- history:       [{"player_id": 1, "game_id": 7, "rating_before": 1200,
+--                  "rating_after": 1216, "k_factor": 48, "expected_score": 0.5}, ...]
+-- snapshot_game: {"game_id": 7, "played_at": "..."} or null
+drop function if exists apply_elo_ratings(jsonb);
+drop function if exists apply_elo_ratings(jsonb, jsonb, jsonb);
+
+create or replace function apply_elo_ratings(
+    ratings jsonb,
+    history jsonb default '[]'::jsonb,
+    snapshot_game jsonb default null,
+    snapshot_interval integer default null
+) returns void
+language plpgsql
+as $$
+declare
+    latest_game_id bigint;
+    latest_played_at timestamptz;
+    games_since integer;
+begin
+    update players pl
+    set elo_rating = r.elo_rating
+    from jsonb_to_recordset(ratings) as r(id bigint, elo_rating integer)
+    where pl.id = r.id;
+
+    insert into rating_history (
+        player_id, game_id, rating_before, rating_after, k_factor, expected_score
+    )
+    select h.player_id, h.game_id, h.rating_before, h.rating_after, h.k_factor, h.expected_score
+    from jsonb_to_recordset(history) as h(
+        player_id bigint,
+        game_id bigint,
+        rating_before integer,
+        rating_after integer,
+        k_factor double precision,
+        expected_score double precision
+    )
+    on conflict (player_id, game_id) do update
+    set
+        rating_before = excluded.rating_before,
+        rating_after = excluded.rating_after,
+        k_factor = excluded.k_factor,
+        expected_score = excluded.expected_score;
+
+    if snapshot_game is null or snapshot_interval is null then
+        return;
+    end if;
+
+    select s.game_id, s.played_at into latest_game_id, latest_played_at
+    from rating_snapshots s
+    order by s.played_at desc, s.game_id desc
+    limit 1;
+
+    select count(*) into games_since
+    from games g
+    where latest_game_id is null
+        or g.played_at > latest_played_at
+        or (g.played_at = latest_played_at and g.id > latest_game_id);
+
+    if games_since >= snapshot_interval then
+        insert into rating_snapshots (game_id, played_at, ratings)
+        select
+            (snapshot_game ->> 'game_id')::bigint,
+            (snapshot_game ->> 'played_at')::timestamptz,
+            jsonb_object_agg(pl.id::text, pl.elo_rating)
+        from players pl
+        on conflict (game_id) do update
+        set played_at = excluded.played_at, ratings = excluded.ratings;
+    end if;
+end;
+$$;
@@ -0,0 +1,54 @@
+-- Applies the stat increments of one finished game to every participant
+-- in a single statement. Mirrors PlayerDBManager._calculate_player_stats.
+--
+-- players_data: [{"id": 1, "team": "A", "was_captain": true, "was_mvp": false}, ...]
+create or replace function apply_game_stats(
+    score_team_a integer,
+    score_team_b integer,
+    players_data jsonb
+) returns void
+language sql
+as $$
+    with participants as (
+        select
+            (p ->> 'id')::bigint as id,
+            coalesce((p ->> 'was_captain')::boolean, false) as was_captain,
+            coalesce((p ->> 'was_mvp')::boolean, false) as was_mvp,
+            case
+                when p ->> 'team' = 'A' then sign(score_team_a - score_team_b)
+                else sign(score_team_b - score_team_a)
+            end as outcome
+        from jsonb_array_elements(players_data) as p
+    ),
+    streaks as (
+        select
+            pa.*,
+            case
+                when pa.outcome > 0 then greatest(1, pl.current_streak + 1)
+                when pa.outcome < 0 then least(-1, pl.current_streak - 1)
+                else 0
+            end as current_streak,
+            case
+                when pa.outcome < 0 then 0
+                else pl.unbeaten_streak + 1
+            end as unbeaten_streak
+        from participants pa
+        join players pl on pl.id = pa.id
+    )
+    update players pl
+    set
+        games_played = pl.games_played + 1,
+        last_played = now(),
+        games_won = pl.games_won + (s.outcome > 0)::int,
+        games_lost = pl.games_lost + (s.outcome < 0)::int,
+        games_drawn = pl.games_drawn + (s.outcome = 0)::int,
+        current_streak = s.current_streak,
+        unbeaten_streak = s.unbeaten_streak,
+        best_streak = greatest(pl.best_streak, s.current_streak),
+        worst_streak = least(pl.worst_streak, s.current_streak),
+        best_unbeaten_streak = greatest(pl.best_unbeaten_streak, s.unbeaten_streak),
+        times_captain = pl.times_captain + s.was_captain::int,
+        times_mvp = pl.times_mvp + s.was_mvp::int
+    from streaks s
+    where pl.id = s.id;
+$$;
@@ -0,0 +1,10 @@
+-- Alternative spellings of player names found in imported game history.
+-- Loaded by PlayerMigration into services.alias_index.AliasIndex; add rows
+-- here instead of editing the hard-coded alias lists.
+create table if not exists player_aliases (
+    alias text primary key,
+    player_id bigint not null references players (id) on delete cascade,
+    created_at timestamptz not null default now()
+);
+
+create index if not exists player_aliases_player_idx on player_aliases (player_id);
@@ -0,0 +1,25 @@
+-- Per-game rating changes, written by apply_elo_ratings with every rating update
+create table if not exists rating_history (
+    player_id bigint not null references players (id) on delete cascade,
+    game_id bigint not null references games (id) on delete cascade,
+    rating_before integer not null,
+    rating_after integer not null,
+    k_factor double precision not null,
+    expected_score double precision not null,
+    created_at timestamptz not null default now(),
+    primary key (player_id, game_id)
+);
+
+create index if not exists rating_history_game_idx on rating_history (game_id);
+
+-- Everyone's rating right after a game, stored every EloConfig.snapshot_interval
+-- games so history queries and partial replays don't start from game zero.
+-- ratings: {"<player_id>": rating}
+create table if not exists rating_snapshots (
+    game_id bigint primary key references games (id) on delete cascade,
+    played_at timestamptz not null,
+    ratings jsonb not null,
+    created_at timestamptz not null default now()
+);
+
+create index if not exists rating_snapshots_played_at_idx on rating_snapshots (played_at);
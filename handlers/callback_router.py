@@ -0,0 +1,89 @@
+from typing import NamedTuple
+
+from telegram import Update
+from telegram.ext import (
+    Application,
+    CallbackQueryHandler,
+    CommandHandler,
+    ContextTypes,
+    ConversationHandler,
+    MessageHandler,
+)
+
+# Actions whose name is two words, e.g. captain_select_<player_id>
+TWO_WORD_ACTIONS = {"captain_method", "captain_select"}
+
+
+class CallbackAction(NamedTuple):
+    """
+    Parsed callback_data: 'vote_-100123_42' -> CallbackAction('vote', (-100123, 42)).
+    Numeric arguments are converted to int.
+    """
+
+    kind: str
+    args: tuple
+
+
+def parse_callback_data(data: str) -> CallbackAction:
+    parts = (data or "").split("_")
+    if "_".join(parts[:2]) in TWO_WORD_ACTIONS:
+        kind, args = "_".join(parts[:2]), parts[2:]
+    else:
+        kind, args = parts[0], parts[1:]
+    return CallbackAction(
+        kind, tuple(int(arg) if arg.lstrip("-").isdigit() else arg for arg in args)
+    )
+
+
+class CallbackRouter:
+    """
+    Single entry point for all inline keyboard callbacks.
+    callback_data is parsed once and the handler registered for its action
+    is looked up in a dict; the handler receives the parsed action.
+    """
+
+    def __init__(self):
+        self.routes = {}  # action kind -> async handler(update, context, action)
+
+    def route(self, kind: str, handler) -> None:
+        self.routes[kind] = handler
+
+    def handler(self) -> CallbackQueryHandler:
+        return CallbackQueryHandler(self.dispatch)
+
+    async def dispatch(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        action = parse_callback_data(query.data)
+        handler = self.routes.get(action.kind)
+        if not handler:
+            # Buttons from an older version of the bot
+            await query.answer()
+            return
+        await handler(update, context, action)
+
+
+def allowed_updates(app: Application) -> list[str]:
+    """
+    Update types the registered handlers can use, so polling and the webhook
+    only receive those. Unknown handler types fall back to everything.
+    """
+    update_types = set()
+
+    def collect(handler):
+        if isinstance(handler, ConversationHandler):
+            for nested in handler.entry_points + handler.fallbacks:
+                collect(nested)
+            for state_handlers in handler.states.values():
+                for nested in state_handlers:
+                    collect(nested)
+        elif isinstance(handler, CallbackQueryHandler):
+            update_types.add(Update.CALLBACK_QUERY)
+        elif isinstance(handler, (CommandHandler, MessageHandler)):
+            update_types.add(Update.MESSAGE)
+        else:
+            update_types.update(Update.ALL_TYPES)
+
+    for handlers in app.handlers.values():
+        for handler in handlers:
+            collect(handler)
+    return sorted(update_types)
@@ -1,18 +1,25 @@
 from models.player import Player
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from telegram.error import BadRequest, TelegramError
 from decorators.admin import admin_only
+from services.broadcast import broadcast
+from services.outbound import PRIORITY_GROUP, PRIORITY_PRIVATE
 
 
 class GameHandlers:
     def __init__(
-        self, game_manager, player_db_manager, game_db_manager, elo_db_manager
+        self,
+        game_manager,
+        player_db_manager,
+        game_db_manager,
+        elo_db_manager,
+        leaderboard_cache,
     ):
         self.game_manager = game_manager
         self.player_db_manager = player_db_manager
         self.game_db_manager = game_db_manager
         self.elo_db_manager = elo_db_manager
+        self.leaderboard_cache = leaderboard_cache
 
     @admin_only
     async def start_game(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -27,8 +34,8 @@ class GameHandlers:
             return
 
         # If no active game exists, create a new one
-        self.game_manager.create_game(chat_id)
-        await self.game_manager.update_join_message(chat_id, context)
+        await self.game_manager.create_game(chat_id)
+        await self.game_manager.update_join_message(chat_id, context, force_new=True)
 
     async def list_players(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         chat_id = update.effective_chat.id
@@ -42,7 +49,7 @@ class GameHandlers:
             await update.message.reply_text("Teams already made!")
             return
 
-        await self.game_manager.update_join_message(chat_id, context)
+        await self.game_manager.update_join_message(chat_id, context, force_new=True)
 
     @admin_only
     async def end_game(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -61,14 +68,14 @@ class GameHandlers:
             # Handle player records
             telegram_players = [p for p in game.players if p.id > 0]
 
-            team_a_external_count = len([p for p in game.teams["Team A"] if p.id < 0])
-            team_b_external_count = len([p for p in game.teams["Team B"] if p.id < 0])
+            team_a_external_count = game.external_count("Team A")
+            team_b_external_count = game.external_count("Team B")
 
             # Prepare player data
             players_data = []
             for player in telegram_players:
-                team = "A" if player in game.teams["Team A"] else "B"
-                was_captain = player in game.captains
+                team = "A" if game.team_of(player.id) == "Team A" else "B"
+                was_captain = game.is_captain(player.id)
 
                 player_data = {
                     "id": player.id,
@@ -78,7 +85,7 @@ class GameHandlers:
                 }
                 players_data.append(player_data)
 
-            game.db_game_id = self.game_db_manager.save_game(
+            game.db_game_id = await self.game_db_manager.aio.save_game(
                 chat_id=chat_id,
                 score_team_a=None,
                 score_team_b=None,
@@ -94,6 +101,7 @@ class GameHandlers:
             traceback.print_exc()
 
         game.game_state = "SCORING"
+        self.game_manager.mark_dirty(chat_id)
         await update.message.reply_text(
             "Please enter the final score using the format: /score TeamA TeamB\n"
             "Example: /score 3 2"
@@ -130,15 +138,17 @@ class GameHandlers:
 
         # Update game object
         game.score = {"Team A": score_a, "Team B": score_b}
+        self.game_manager.mark_dirty(chat_id)
 
         # Update game record in database
         try:
             if hasattr(game, "db_game_id"):
-                self.game_db_manager.update_game_score(
+                await self.game_db_manager.aio.update_game_score(
                     game.db_game_id, score_a, score_b
                 )
                 # Process ELO ratings after updating score
-                self.elo_db_manager.process_game_ratings(game.db_game_id)
+                await self.elo_db_manager.aio.process_game_ratings(game.db_game_id)
+                self.leaderboard_cache.invalidate()
             else:
                 print("Warning: No db_game_id found for game")
 
@@ -167,43 +177,48 @@ class GameHandlers:
         game.game_state = "VOTING"
         game.mvp_votes = {}
         game.voting_players = []  # Track players who can vote
+        self.game_manager.mark_dirty(chat_id)
 
-        # Create voting keyboard
+        # Create voting keyboard once, it's the same for every ballot
         keyboard = []
         for player in game.players:
             player_name = f"{player.display_name}"
             button = InlineKeyboardButton(
-                player_name, callback_data=f"vote_{player.id}"
+                player_name, callback_data=f"vote_{chat_id}_{player.id}"
             )
             keyboard.append([button])
 
         reply_markup = InlineKeyboardMarkup(keyboard)
+        ballot_text = (
+            f"🏆 MVP Vote for game in {update.effective_chat.title} 🏆\n\n"
+            f"Final Score:\n"
+            f"Team A: {game.score['Team A']}\n"
+            f"Team B: {game.score['Team B']}\n\n"
+            "Choose the most valuable player:"
+        )
 
-        # Inform group that voting is starting
-        await update.message.reply_text(
-            "Starting MVP voting! Check your private messages to cast your vote.\n"
-            "If you haven't received a message, please start a private chat with me first."
+        # Inform group that voting is starting, ahead of the ballots below
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text="Starting MVP voting! Check your private messages to cast your vote.\n"
+            "If you haven't received a message, please start a private chat with me first.",
+            rate_limit_args=PRIORITY_GROUP,
         )
 
-        # Send private messages and track successful sends
-        failed_players = []
-        for player in game.players:
-            try:
-                await context.bot.send_message(
-                    chat_id=player.id,
-                    text=(
-                        f"🏆 MVP Vote for game in {update.effective_chat.title} 🏆\n\n"
-                        f"Final Score:\n"
-                        f"Team A: {game.score['Team A']}\n"
-                        f"Team B: {game.score['Team B']}\n\n"
-                        "Choose the most valuable player:"
-                    ),
-                    reply_markup=reply_markup,
-                )
-                game.voting_players.append(player)  # Add to voting players list
-            except (BadRequest, TelegramError) as e:
-                failed_players.append(player.display_name)
-                continue
+        # Send all ballots concurrently, a player can vote as soon as theirs arrives
+        async def send_ballot(player):
+            await context.bot.send_message(
+                chat_id=player.id,
+                text=ballot_text,
+                reply_markup=reply_markup,
+                rate_limit_args=PRIORITY_PRIVATE,
+            )
+            game.voting_players.append(player)
+            self.game_manager.register_voter(chat_id, player.id)
+
+        _, failed = await broadcast(send_ballot, game.players)
+        failed_players = [player.display_name for player, _ in failed]
+        self.game_manager.mark_dirty(chat_id)
 
         # If any players couldn't receive messages, inform the group
         if failed_players:
@@ -258,6 +273,7 @@ class GameHandlers:
 
         # Set the game's players to our dummy list
         game.players = dummy_players
+        self.game_manager.mark_dirty(chat_id)
 
         # Update the join message
         await self.game_manager.update_join_message(chat_id, context)
@@ -285,12 +301,12 @@ class GameHandlers:
 
         player_name = " ".join(context.args)
 
-        if len(game.players) >= game.max_players:
+        if game.player_count >= game.max_players:
             await context.bot.send_message(chat_id=chat_id, text="Game is full!")
             return
 
         # Create unique negative ID for external player
-        external_id = -1 * (len([p for p in game.players if p.id < 0]) + 1)
+        external_id = min((p.id for p in game.players if p.id < 0), default=0) - 1
         external_player = ExternalPlayer(external_id, player_name)
 
         # Check if player with same name already exists
@@ -300,7 +316,8 @@ class GameHandlers:
             )
             return
 
-        game.players.append(external_player)
+        game.add_player(external_player)
+        self.game_manager.mark_dirty(chat_id)
         await self.game_manager.update_join_message(chat_id, context)
 
     async def remove_external(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -334,7 +351,8 @@ class GameHandlers:
                 break
 
         if external_player:
-            game.players.remove(external_player)
+            game.remove_player(external_player.id)
+            self.game_manager.mark_dirty(chat_id)
             await self.game_manager.update_join_message(chat_id, context)
             await context.bot.send_message(
                 chat_id=chat_id, text=f"Removed external player: {player_name}"
@@ -358,6 +376,8 @@ class GameHandlers:
 
 
 class ExternalPlayer:
+    __slots__ = ("id", "display_name")
+
     def __init__(self, id: int, display_name: str):
         self.id = id  # We'll use negative IDs for external players to avoid conflicts
         self.display_name = display_name
@@ -1,20 +1,35 @@
 import os
-from database.elo import EloDBManager
+from handlers.callback_router import CallbackAction, parse_callback_data
 from models.game_player import GamePlayer
+from services.broadcast import broadcast
+from services.outbound import PRIORITY_PRIVATE
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 import random
 
 
 class PlayerHandlers:
-    def __init__(self, game_manager, player_db_manager, game_db_manager):
+    def __init__(
+        self,
+        game_manager,
+        player_db_manager,
+        game_db_manager,
+        elo_db_manager,
+        leaderboard_cache,
+    ):
         self.game_manager = game_manager
         self.player_db_manager = player_db_manager
         self.game_db_manager = game_db_manager
-        self.elo_manager = EloDBManager()
+        self.elo_manager = elo_db_manager
+        self.leaderboard_cache = leaderboard_cache
         self.admin_ids = os.getenv("ADMIN_IDS").split(",")
 
-    async def handle_join(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    async def handle_join(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        action: CallbackAction | None = None,
+    ):
         query = update.callback_query
         chat_id = query.message.chat_id
         telegram_user = query.from_user
@@ -25,8 +40,10 @@ class PlayerHandlers:
             await query.answer("No active game!")
             return
 
-        # Check if user is registered
-        display_name = self.player_db_manager.get_player_display_name(player.id)
+        # Check if user is registered, answering from the directory when possible
+        display_name = self.player_db_manager.directory.get(
+            player.id
+        ) or await self.player_db_manager.aio.get_player_display_name(player.id)
         if not display_name:
             await query.answer(
                 "You need to register first! Start a private chat with me and use /start",
@@ -36,24 +53,28 @@ class PlayerHandlers:
         else:
             player.display_name = display_name
 
-        if player.id in [p.id for p in game.players]:
+        if game.has_player(player.id):
             await query.answer("You already joined!")
             return
 
-        if len(game.players) >= game.max_players:
+        if game.player_count >= game.max_players:
             await query.answer("Game is full!")
             return
 
-        game.players.append(player)
-        self.game_db_manager.save_active_game_players(chat_id, game.players)
-        await context.bot.send_message(chat_id, f"{player.display_name} joined!")
+        game.add_player(player)
+        self.game_manager.mark_dirty(chat_id)
         await self.game_manager.update_join_message(chat_id, context)
         await query.answer("You joined the game!")
 
-        if len(game.players) == game.max_players:
+        if game.player_count == game.max_players:
             await self.select_captains(chat_id, context)
 
-    async def handle_leave(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    async def handle_leave(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        action: CallbackAction | None = None,
+    ):
         query = update.callback_query
         chat_id = query.message.chat_id
         telegram_user = query.from_user
@@ -64,85 +85,35 @@ class PlayerHandlers:
             await query.answer("No active game!")
             return
 
-        if player.id not in [p.id for p in game.players]:
+        if not game.has_player(player.id):
             await query.answer("You haven't joined the game!")
             return
 
-        display_name = self.player_db_manager.get_player_display_name(player.id)
-
-        game.players = [p for p in game.players if p.id != player.id]
-        self.game_db_manager.save_active_game_players(chat_id, game.players)
-        await context.bot.send_message(chat_id, f"{display_name} left!")
+        game.remove_player(player.id)
+        self.game_manager.mark_dirty(chat_id)
         await self.game_manager.update_join_message(chat_id, context)
         await query.answer("You left the game!")
 
-    async def start_mvp_voting(
-        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    async def handle_vote(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        action: CallbackAction | None = None,
     ):
-        chat_id = update.effective_chat.id
-        game = self.game_manager.get_game(chat_id)
-
-        if not game:
-            await update.message.reply_text("No active game!")
-            return
-
-        # Initialize voting state
-        game.game_state = "VOTING"
-        game.mvp_votes = {}
-        game.voting_players = []
-
-        # Create voting keyboard
-        keyboard = []
-        for player in game.players:
-            player_name = f"{player.display_name}"
-            button = InlineKeyboardButton(
-                player_name, callback_data=f"vote_{player.id}"
-            )
-            keyboard.append([button])
-
-        reply_markup = InlineKeyboardMarkup(keyboard)
-
-        # Inform group that voting is starting
-        await update.message.reply_text(
-            "Starting MVP voting! Check your private messages to cast your vote.\n"
-            "If you haven't received a message, please start a private chat with me first."
-        )
-
-        # Send private messages and track successful sends
-        failed_players = []
-        for player in game.players:
-            try:
-                await context.bot.send_message(
-                    chat_id=player.id,
-                    text=(
-                        f"🏆 MVP Vote for game in {update.effective_chat.title} 🏆\n\n"
-                        f"Final Score:\n"
-                        f"Team A: {game.score['Team A']}\n"
-                        f"Team B: {game.score['Team B']}\n\n"
-                        "Choose the most valuable player:"
-                    ),
-                    reply_markup=reply_markup,
-                )
-                game.voting_players.append(player)  # Add to voting players list
-            except (BadRequest, TelegramError) as e:
-                failed_players.append(player.display_name)
-                continue
-
-        # If any players couldn't receive messages, inform the group
-        if failed_players:
-            await update.message.reply_text(
-                f"⚠️ Couldn't send voting message to: {', '.join(failed_players)}\n"
-                "These players won't participate in the MVP voting."
-            )
-
-    async def handle_vote(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle incoming MVP votes"""
         query = update.callback_query
         voter = query.from_user
-        voted_id = int(query.data.split("_")[1])
+
+        # Ballots carry the group's chat id: vote_<chat_id>_<player_id>.
+        # Older ballots only have vote_<player_id>.
+        action = action or parse_callback_data(query.data)
+        if len(action.args) == 2:
+            chat_id, voted_id = action.args
+        else:
+            chat_id, voted_id = None, action.args[0]
 
         # Find active game and validate vote
-        game, game_chat_id = self._find_active_voting_game(voter.id)
+        game, game_chat_id = self._find_active_voting_game(voter.id, chat_id)
         if not game:
             await query.answer("No active voting session found!")
             return
@@ -153,28 +124,29 @@ class PlayerHandlers:
 
         # Record vote and notify voter
         voted_player = self._record_vote(game, voter.id, voted_id)
+        self.game_manager.mark_dirty(game_chat_id)
         await query.message.delete()
 
         # Check if voting is complete
         if len(game.mvp_votes) == len(game.voting_players):
+            await query.answer("Vote recorded!")
             await self._handle_voting_completion(game, game_chat_id, context)
         else:
             await self._send_vote_confirmation(context, voter.id, voted_player)
             await query.answer("Vote recorded!")
 
-    def _find_active_voting_game(self, voter_id):
+    def _find_active_voting_game(self, voter_id, chat_id=None):
         """Find the game where the voter is participating"""
-        for chat_id, game in self.game_manager.games.items():
-            if game.game_state == "VOTING" and voter_id in [
-                p.id for p in game.voting_players
-            ]:
-                return game, chat_id
-        return None, None
+        game_chat_id = self.game_manager.find_voting_chat(voter_id, chat_id)
+        game = self.game_manager.get_game(game_chat_id)
+        if not game or game.game_state != "VOTING":
+            return None, None
+        return game, game_chat_id
 
     def _record_vote(self, game, voter_id, voted_id):
         """Record a vote and return the voted player"""
         game.mvp_votes[voter_id] = voted_id
-        return next(p for p in game.players if p.id == voted_id)
+        return game.get_player(voted_id)
 
     def _count_votes(self, game):
         """Count votes and determine MVP(s)"""
@@ -184,13 +156,14 @@ class PlayerHandlers:
 
         max_votes = max(vote_count.values())
         mvp_ids = [pid for pid, votes in vote_count.items() if votes == max_votes]
-        mvps = [next(p for p in game.players if p.id == mvp_id) for mvp_id in mvp_ids]
+        mvps = [game.get_player(mvp_id) for mvp_id in mvp_ids]
 
         return mvps, max_votes
 
     async def _handle_voting_completion(self, game, chat_id, context):
         """Handle the completion of MVP voting"""
         mvps, max_votes = self._count_votes(game)
+        mvp_ids = {p.id for p in mvps}
 
         try:
             # Prepare final player data with MVP information
@@ -201,14 +174,14 @@ class PlayerHandlers:
 
                 player_data = {
                     "id": player.id,
-                    "team": "A" if player in game.teams["Team A"] else "B",
-                    "was_captain": player in game.captains,
-                    "was_mvp": player in mvps,
+                    "team": "A" if game.team_of(player.id) == "Team A" else "B",
+                    "was_captain": game.is_captain(player.id),
+                    "was_mvp": player.id in mvp_ids,
                 }
                 players_data.append(player_data)
 
             # Update all player stats now that we have complete information
-            self.player_db_manager.update_player_stats(
+            await self.player_db_manager.aio.update_player_stats(
                 score_team_a=game.score["Team A"],
                 score_team_b=game.score["Team B"],
                 players_data=players_data,
@@ -221,15 +194,15 @@ class PlayerHandlers:
         result_text = self._format_mvp_announcement(mvps, max_votes)
         await context.bot.send_message(chat_id=chat_id, text=result_text)
 
-        # Notify voters
-        await self._notify_voters_completion(game, context)
+        # Notify voters in the background
+        self._notify_voters_completion(game, context)
 
-        # Update player elo ratings
-        self.elo_manager.process_game_ratings(game.db_game_id)
+        # Ratings were already applied when the score was entered (see
+        # GameHandlers.handle_score); the stats above still change the board
+        self.leaderboard_cache.invalidate()
 
         # Clean up
-        self.game_db_manager.remove_active_game(chat_id)
-        self.game_manager.remove_game(chat_id)
+        await self.game_manager.remove_game(chat_id)
 
     def _format_mvp_announcement(self, mvps, max_votes):
         """Format the MVP announcement message"""
@@ -239,13 +212,24 @@ class PlayerHandlers:
             names = ", ".join(p.display_name for p in mvps)
             return f"🏆 It's a tie! MVPs of the game: {names}\nEach with {max_votes} votes!"
 
-    async def _notify_voters_completion(self, game, context):
-        """Send completion notifications to all voters"""
-        for voter_id in game.mvp_votes.keys():
-            await context.bot.send_message(
+    def _notify_voters_completion(self, game, context):
+        """Schedule completion notifications to all voters without waiting on them"""
+        context.application.create_task(
+            self._send_completion_notifications(list(game.mvp_votes), context.bot)
+        )
+
+    async def _send_completion_notifications(self, voter_ids, bot):
+        """Send the completion DMs as one rate-limited batch and log failures"""
+        _, failed = await broadcast(
+            lambda voter_id: bot.send_message(
                 chat_id=voter_id,
                 text="✅ Voting complete! Results have been announced in the group.",
-            )
+                rate_limit_args=PRIORITY_PRIVATE,
+            ),
+            voter_ids,
+        )
+        for voter_id, error in failed:
+            print(f"Error notifying voter {voter_id}: {error}")
 
     async def _send_vote_confirmation(self, context, voter_id, voted_player):
         """Send confirmation message to the voter"""
@@ -267,10 +251,11 @@ class PlayerHandlers:
                 text="Not enough players to select captains. Need at least 2 non-external players.",
             )
             # Reset game state
-            self.game_manager.remove_game(chat_id)
+            await self.game_manager.remove_game(chat_id)
             return
 
         game.game_state = "CAPTAIN_METHOD_CHOICE"
+        self.game_manager.mark_dirty(chat_id)
 
         # Change callback data to use 'captain_method' prefix
         keyboard = [
@@ -292,7 +277,10 @@ class PlayerHandlers:
         )
 
     async def handle_captain_method(
-        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        action: CallbackAction | None = None,
     ):
         query = update.callback_query
         chat_id = query.message.chat_id
@@ -306,13 +294,18 @@ class PlayerHandlers:
             await query.answer("That's only for admins!")
             return
 
-        selection_method = query.data.split("_")[2]  # 'random' or 'manual'
+        # Answer before the group messages, which wait for the chat's rate limit
+        await query.answer()
+
+        action = action or parse_callback_data(query.data)
+        selection_method = action.args[0]  # 'random' or 'manual'
         game.captain_selection_method = selection_method
 
         if selection_method == "random":
             # Random selection logic remains the same
             game.captains = random.sample(game.players, 2)
             game.game_state = "DRAFT_CHOICE"
+            self.game_manager.mark_dirty(chat_id)
 
             await query.message.delete()
 
@@ -336,6 +329,7 @@ class PlayerHandlers:
             # Manual selection process
             game.game_state = "CAPTAIN_SELECTION"
             game.captains = []
+            self.game_manager.mark_dirty(chat_id)
 
             await query.message.delete()
 
@@ -357,7 +351,10 @@ class PlayerHandlers:
             )
 
     async def handle_captain_selection(
-        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        action: CallbackAction | None = None,
     ):
         query = update.callback_query
         chat_id = query.message.chat_id
@@ -371,14 +368,23 @@ class PlayerHandlers:
             await query.answer("That's only for admins!")
             return
 
-        selected_id = int(query.data.split("_")[2])  # Changed index to 2
-        selected_player = next(p for p in game.players if p.id == selected_id)
+        action = action or parse_callback_data(query.data)
+        selected_id = action.args[0]
+        selected_player = game.get_player(selected_id)
+
+        if not selected_player or game.is_captain(selected_id):
+            await query.answer("That player can't be selected!")
+            return
+
+        # Answer before the group messages, which wait for the chat's rate limit
+        await query.answer()
 
         if not game.captains:
             # First captain selection (Team A)
-            game.captains.append(selected_player)
+            game.add_captain(selected_player)
+            self.game_manager.mark_dirty(chat_id)
 
-            remaining_players = [p for p in game.players if p != selected_player]
+            remaining_players = [p for p in game.players if p.id != selected_id]
             keyboard = [
                 [
                     InlineKeyboardButton(
@@ -396,8 +402,9 @@ class PlayerHandlers:
             )
         else:
             # Second captain selection (Team B)
-            game.captains.append(selected_player)
+            game.add_captain(selected_player)
             game.game_state = "DRAFT_CHOICE"
+            self.game_manager.mark_dirty(chat_id)
 
             await query.message.delete()
 
@@ -418,10 +425,11 @@ class PlayerHandlers:
                 reply_markup=reply_markup,
             )
 
-        await query.answer()
-
     async def handle_draft_choice(
-        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        action: CallbackAction | None = None,
     ):
         query = update.callback_query
         chat_id = query.message.chat_id
@@ -435,11 +443,16 @@ class PlayerHandlers:
             await query.answer("That's only for admins!")
             return
 
-        draft_method = query.data.split("_")[1]  # 'abab' or 'abba'
+        # Answer before the group messages, which wait for the chat's rate limit
+        await query.answer()
+
+        action = action or parse_callback_data(query.data)
+        draft_method = action.args[0]  # 'abab' or 'abba'
         game.draft_method = draft_method
         game.game_state = "SELECTION"
         game.current_selector = game.captains[0]
         game.selection_round = 0
+        self.game_manager.mark_dirty(chat_id)
 
         # Announce the draft method and captains
         method_name = (
@@ -458,10 +471,11 @@ class PlayerHandlers:
         # Show the teams message with selection buttons
         await self.game_manager.update_teams_message(chat_id, context)
 
-        await query.answer()
-
     async def handle_selection(
-        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        action: CallbackAction | None = None,
     ):
         query = update.callback_query
         chat_id = query.message.chat_id
@@ -475,15 +489,22 @@ class PlayerHandlers:
             await query.answer("It's not your turn to select!")
             return
 
-        selected_id = int(query.data.split("_")[1])
-        selected_player = next(p for p in game.players if p.id == selected_id)
+        action = action or parse_callback_data(query.data)
+        selected_id = action.args[0]
+        if not game.is_undrafted(selected_id):
+            await query.answer("That player was already picked!")
+            return
+        selected_player = game.get_player(selected_id)
+
+        # Answer before the group messages, which wait for the chat's rate limit
+        await query.answer()
 
         # Determine current team and add player
-        team_name = "Team A" if game.current_selector == game.captains[0] else "Team B"
-        game.teams[team_name].append(selected_player)
+        team_name = game.team_of(game.current_selector.id)
+        game.assign_player(team_name, selected_player)
 
         # Calculate total players selected (excluding captains)
-        total_selected = len(game.teams["Team A"]) + len(game.teams["Team B"])
+        total_selected = game.team_size("Team A") + game.team_size("Team B")
 
         # Determine next selector based on draft method
         if game.draft_method == "abab":
@@ -503,13 +524,16 @@ class PlayerHandlers:
             else:  # Fourth pick of sequence
                 game.current_selector = game.captains[0]  # Goes back to A
 
+        self.game_manager.mark_dirty(chat_id)
+
         force_new = False
         players_per_team = (game.max_players - 2) // 2
         if (
-            len(game.teams["Team A"]) == players_per_team
-            and len(game.teams["Team B"]) == players_per_team
+            game.team_size("Team A") == players_per_team
+            and game.team_size("Team B") == players_per_team
         ):
             game.game_state = "COLOR_SELECTION"
+            self.game_manager.mark_dirty(chat_id)
 
             # Simple two-option keyboard
             keyboard = [
@@ -534,10 +558,12 @@ class PlayerHandlers:
 
         # Update the teams message
         await self.game_manager.update_teams_message(chat_id, context, force_new)
-        await query.answer()
 
     async def handle_color_selection(
-        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        action: CallbackAction | None = None,
     ):
         query = update.callback_query
         chat_id = query.message.chat_id
@@ -551,18 +577,22 @@ class PlayerHandlers:
             await query.answer("Only Team B captain can select the color!")
             return
 
-        choice = query.data.split("_")[1]
+        action = action or parse_callback_data(query.data)
+        choice = action.args[0]
         print("choice")
         print(choice)
         game.team_b_white = choice == "white"
         game.game_state = "IN_GAME"
+        self.game_manager.mark_dirty(chat_id)
+
+        # Answer before the group messages, which wait for the chat's rate limit
+        await query.answer("Color choice confirmed!")
 
         # Delete color selection message
         await query.message.delete()
 
         # Show final teams with colors
         await self.game_manager.update_teams_message(chat_id, context)
-        await query.answer("Color choice confirmed!")
 
     async def show_player_stats(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
@@ -572,11 +602,11 @@ class PlayerHandlers:
 
         if not context.args:
             user_id = update.effective_user.id
-            player = self.player_db_manager.get_player(user_id)
+            player = await self.player_db_manager.aio.get_player(user_id)
 
         else:
             player_display_name = context.args[0]
-            player = self.player_db_manager.get_player_by_display_name(
+            player = await self.player_db_manager.aio.get_player_by_display_name(
                 player_display_name
             )
 
@@ -610,35 +640,5 @@ class PlayerHandlers:
     async def show_leaderboard(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ):
-        """Display top 10 players by ELO rating (minimum 5 games played)"""
-        top_players = self.player_db_manager.get_leaderboard()
-
-        if not top_players:
-            await update.message.reply_text(
-                "No players with enough games yet! Play more to appear on the leaderboard."
-            )
-            return
-
-        # Create leaderboard message
-        message = "🏆 ELO Rating Leaderboard 🏆\n\n"
-
-        for i, player in enumerate(top_players, 1):
-            # Calculate win rate
-            win_rate = (
-                (player.games_won / player.games_played * 100)
-                if player.games_played > 0
-                else 0
-            )
-
-            # Add medal emoji for top 3
-            medal = {1: "🥇", 2: "🥈", 3: "🥉"}.get(i, "👤")
-
-            # Format player stats
-            message += (
-                f"{medal} {i}. {player.display_name}\n"
-                f"   • ELO: {player.elo_rating}\n"
-                f"   • Win Rate: {win_rate:.1f}%\n"
-                f"   • W/L/D: {player.games_won}/{player.games_lost}/{player.games_drawn}\n"
-            )
-
-        await update.message.reply_text(message)
+        """Display the top players by ELO rating, served from the leaderboard cache"""
+        await update.message.reply_text(await self.leaderboard_cache.get_text())
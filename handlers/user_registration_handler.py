@@ -39,7 +39,7 @@ class UserRegistrationHandler:
         user = update.effective_user
 
         # Check if user is already registered
-        existing_player = self.player_db_manager.get_player(user.id)
+        existing_player = await self.player_db_manager.aio.get_player(user.id)
         if existing_player:
             await update.message.reply_text(
                 f"Welcome back {existing_player.display_name}! You're already registered!"
@@ -68,7 +68,7 @@ class UserRegistrationHandler:
 
         # Create our custom user object
         player = Player(telegram_user, display_name)
-        result = self.player_db_manager.create_player(player)
+        result = await self.player_db_manager.aio.create_player(player)
 
         if result:
             await update.message.reply_text(
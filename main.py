@@ -1,42 +1,78 @@
-from telegram import Update
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler
+from telegram.ext import Application, CommandHandler
 from datetime import datetime
 import asyncio
+import os
 import nest_asyncio
 from config import TOKEN
-from database.base import BaseManager
 from database.elo import EloDBManager
 from database.game import GameDBManager
 from database.player import PlayerDBManager
+from handlers.callback_router import CallbackRouter, allowed_updates
 from handlers.game_handlers import GameHandlers
 from handlers.player_handlers import PlayerHandlers
 from handlers.user_registration_handler import UserRegistrationHandler
 from services.game_manager import GameManager
+from services.leaderboard_cache import LeaderboardCache
+from services.outbound import OutboundScheduler
+from services.update_processor import ChatSerializedUpdateProcessor
+from services.webhook import WebhookServer
 
 nest_asyncio.apply()
 
 
-async def main():
-    app = Application.builder().token(TOKEN).build()
+def build_application(
+    token=TOKEN, base_url=None, concurrent_updates: int = 1
+) -> Application:
+    """
+    Create the bot with all its services and handlers.
+    base_url points the bot at another Bot API server (e.g. a local fake).
+    With concurrent_updates > 1 different chats are handled in parallel,
+    updates within one chat still one at a time.
+    """
+    # Every Telegram request goes through the outbound scheduler's rate limits
+    builder = (
+        Application.builder()
+        .token(token)
+        .rate_limiter(OutboundScheduler())
+        .concurrent_updates(ChatSerializedUpdateProcessor(concurrent_updates))
+    )
+    if base_url:
+        builder = builder.base_url(base_url)
+    app = builder.build()
 
-    # Initialize database managers
-    base_db_manager = BaseManager()
+    # Initialize database managers (they all share one pooled Supabase client)
     player_db_manager = PlayerDBManager()
     game_db_manager = GameDBManager()
     elo_db_manager = EloDBManager()
+    player_db_manager.load_directory()
 
     # Initialize services and handlers
     game_manager = GameManager(game_db_manager)
+
+    async def flush_active_games(_app: Application) -> None:
+        # Write-behind changes still waiting for their delay would be lost
+        await game_manager.state_writer.flush_all()
+
+    app.post_stop = flush_active_games
+    leaderboard_cache = LeaderboardCache(
+        player_db_manager,
+        min_games=int(os.getenv("LEADERBOARD_MIN_GAMES", "5")),
+        size=int(os.getenv("LEADERBOARD_SIZE", "5")),
+        ttl=float(os.getenv("LEADERBOARD_CACHE_TTL", "600")),
+    )
     game_handlers = GameHandlers(
         game_manager=game_manager,
         player_db_manager=player_db_manager,
         game_db_manager=game_db_manager,
         elo_db_manager=elo_db_manager,
+        leaderboard_cache=leaderboard_cache,
     )
     player_handlers = PlayerHandlers(
         game_manager=game_manager,
         player_db_manager=player_db_manager,
         game_db_manager=game_db_manager,
+        elo_db_manager=elo_db_manager,
+        leaderboard_cache=leaderboard_cache,
     )
     user_registration_handler = UserRegistrationHandler(player_db_manager)
 
@@ -52,38 +88,68 @@ async def main():
     app.add_handler(CommandHandler("add_external", game_handlers.add_external))
     app.add_handler(CommandHandler("remove_external", game_handlers.remove_external))
     app.add_handler(CommandHandler("stats", player_handlers.show_player_stats))
-    app.add_handler(CallbackQueryHandler(player_handlers.handle_join, pattern="^join"))
     app.add_handler(CommandHandler("leaderboard", player_handlers.show_leaderboard))
     app.add_handler(CommandHandler("teams", game_handlers.show_teams))
 
-    app.add_handler(
-        CallbackQueryHandler(player_handlers.handle_leave, pattern="^leave")
-    )
-    app.add_handler(
-        CallbackQueryHandler(player_handlers.handle_selection, pattern="^select_")
-    )
-    app.add_handler(CallbackQueryHandler(player_handlers.handle_vote, pattern="^vote_"))
-    app.add_handler(
-        CallbackQueryHandler(player_handlers.handle_draft_choice, pattern=r"^draft_")
-    )
-    app.add_handler(
-        CallbackQueryHandler(player_handlers.handle_color_selection, pattern="^color_")
-    )
-    app.add_handler(
-        CallbackQueryHandler(
-            player_handlers.handle_captain_method, pattern="^captain_method_"
-        )
-    )
-    app.add_handler(
-        CallbackQueryHandler(
-            player_handlers.handle_captain_selection, pattern="^captain_select_"
-        )
+    # All inline keyboard buttons, routed by the action in their callback_data
+    callback_router = CallbackRouter()
+    callback_router.route("join", player_handlers.handle_join)
+    callback_router.route("leave", player_handlers.handle_leave)
+    callback_router.route("select", player_handlers.handle_selection)
+    callback_router.route("vote", player_handlers.handle_vote)
+    callback_router.route("draft", player_handlers.handle_draft_choice)
+    callback_router.route("color", player_handlers.handle_color_selection)
+    callback_router.route("captain_method", player_handlers.handle_captain_method)
+    callback_router.route("captain_select", player_handlers.handle_captain_selection)
+    app.add_handler(callback_router.handler())
+
+    return app
+
+
+async def run_webhook(app: Application) -> None:
+    """
+    Receive updates through a webhook instead of polling getUpdates.
+    The endpoint is registered with Telegram when WEBHOOK_URL is set; without
+    it the server just listens (e.g. behind a proxy or for a local harness).
+    """
+    server = WebhookServer(
+        app,
+        secret_token=os.getenv("WEBHOOK_SECRET"),
+        host=os.getenv("WEBHOOK_HOST", "0.0.0.0"),
+        port=int(os.getenv("WEBHOOK_PORT", "8443")),
+        path=os.getenv("WEBHOOK_PATH", "/telegram"),
     )
+    async with app:
+        await app.start()
+        await server.start()
+        webhook_url = os.getenv("WEBHOOK_URL")
+        if webhook_url:
+            await app.bot.set_webhook(
+                url=webhook_url,
+                secret_token=server.secret_token,
+                allowed_updates=allowed_updates(app),
+            )
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+            await app.stop()
+            # Only run_polling calls post_stop by itself
+            if app.post_stop:
+                await app.post_stop(app)
 
-    print("Soccer Bot started! Press Ctrl+C to exit.")
 
-    # Start the bot
-    await app.run_polling(allowed_updates=Update.ALL_TYPES)
+async def main():
+    app = build_application(
+        concurrent_updates=int(os.getenv("CONCURRENT_UPDATES", "8"))
+    )
+    if os.getenv("BOT_MODE", "polling") == "webhook":
+        print("Soccer Bot started in webhook mode! Press Ctrl+C to exit.")
+        await run_webhook(app)
+    else:
+        print("Soccer Bot started! Press Ctrl+C to exit.")
+        # Start the bot
+        await app.run_polling(allowed_updates=allowed_updates(app))
 
 
 if __name__ == "__main__":
@@ -1,14 +1,20 @@
 from datetime import datetime
 import logging
-from typing import List, Dict
+import sys
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List
 from database.game import GameDBManager
 from database.elo import EloDBManager
 from database.player import PlayerDBManager
 from migrate_players import PlayerMigration
+from services.history_import import HistoryImportPipeline
 
 # logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Failed games listed by name in the final report, the rest are only counted
+MAX_FAILED_LISTED = 20
+
 
 class GameHistoryProcessor:
     def __init__(self):
@@ -21,14 +27,20 @@ class GameHistoryProcessor:
 
     def process_game_data(self, raw_data: str) -> List[Dict]:
         """Process raw game data into structured format"""
-        games = []
+        return list(self.iter_games(raw_data.splitlines()))
+
+    def iter_games(self, lines: Iterable[str]) -> Iterator[Dict]:
+        """
+        Parse games lazily from any iterable of lines (an open file, stdin, a
+        list), yielding each game as soon as its block is complete
+        """
         current_game = None
 
-        for line in raw_data.split("\n"):
+        for line in lines:
             line = line.strip()
             if not line or line == "-------------------":
                 if current_game:
-                    games.append(current_game)
+                    yield current_game
                     current_game = None
                 continue
 
@@ -42,9 +54,7 @@ class GameHistoryProcessor:
                 self._process_team(current_game, line)
 
         if current_game:
-            games.append(current_game)
-
-        return games
+            yield current_game
 
     def _init_game(self, line: str) -> Dict:
         """Initialize a new game record"""
@@ -123,65 +133,12 @@ class GameHistoryProcessor:
             self.external_counter += 1
         return self.external_players[name]
 
-    def save_games(self, games: List[Dict]) -> Dict[str, List]:
-        """Save all games to database"""
-        results = {"success": [], "failed": []}
-
-        HISTORICAL_IMPORT_CHAT_ID = 999999  # Special chat_id for historical games
-
-        for game in games:
-            try:
-                # Prepare player data for database
-                players_data = []
-                team_a_external_count = 0
-                team_b_external_count = 0
-                for team, team_letter in [(game["team_a"], "A"), (game["team_b"], "B")]:
-                    for player in team:
-                        if player["player_id"] > 0:  # Only include registered players
-                            players_data.append(
-                                {
-                                    "id": player["player_id"],
-                                    "team": team_letter,
-                                    "was_captain": player["is_captain"],
-                                    "was_mvp": False,  # MVP data not available in historical data
-                                }
-                            )
-                        else:
-                            if team_letter == "A":
-                                team_a_external_count += 1
-                            else:
-                                team_b_external_count += 1
-
-                # Save game
-                game_id = self.game_db_manager.save_game(
-                    chat_id=HISTORICAL_IMPORT_CHAT_ID,
-                    score_team_a=game["score_a"],
-                    score_team_b=game["score_b"],
-                    players_data=players_data,
-                    team_a_external_count=team_a_external_count,
-                    team_b_external_count=team_b_external_count,
-                )
-
-                if game_id:
-                    # Update player stats
-                    self.player_db_manager.update_player_stats(
-                        score_team_a=game["score_a"],
-                        score_team_b=game["score_b"],
-                        players_data=players_data,
-                    )
-
-                    # Process ELO ratings
-                    self.elo_db_manager.process_game_ratings(game_id)
-
-                    results["success"].append(game)
-                else:
-                    results["failed"].append(game)
-
-            except Exception as e:
-                logger.error(f"Error saving game: {e}")
-                results["failed"].append(game)
-
-        return results
+    def save_games(self, games: Iterable[Dict], dry_run: bool = False) -> Dict:
+        """Save all games to database in bulk, see HistoryImportPipeline"""
+        pipeline = HistoryImportPipeline(
+            self.player_db_manager, self.game_db_manager, self.elo_db_manager
+        )
+        return pipeline.run(games, dry_run=dry_run)
 
 
 def validate_game(game: Dict) -> List[str]:
@@ -212,17 +169,40 @@ def validate_game(game: Dict) -> List[str]:
     return issues
 
 
-def dry_run(raw_data: str) -> Dict:
+def iter_valid_games(games: Iterable[Dict], skip_invalid: bool = False):
+    """
+    Pipeline stage running validate_game on each parsed game.
+    Issues are logged; with skip_invalid the game is also dropped.
+    """
+    for game in games:
+        issues = validate_game(game)
+        if issues:
+            logger.warning(f"Game from {game['date']}: {'; '.join(issues)}")
+            if skip_invalid:
+                continue
+        yield game
+
+
+@contextmanager
+def open_history(path: str):
+    """Open the history export for line-by-line reading, '-' means stdin"""
+    if path == "-":
+        yield sys.stdin
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            yield f
+
+
+def dry_run(lines: Iterable[str]) -> Dict:
     """Perform a dry run of the game import process"""
     processor = GameHistoryProcessor()
 
     # Process games
     logger.info("Processing game data...")
-    games = processor.process_game_data(raw_data)
 
     # Initialize results
     results = {
-        "total_games": len(games),
+        "total_games": 0,
         "valid_games": 0,
         "games_with_issues": 0,
         "total_players": set(),
@@ -232,7 +212,8 @@ def dry_run(raw_data: str) -> Dict:
     }
 
     # Analyze each game
-    for i, game in enumerate(games, 1):
+    for i, game in enumerate(processor.iter_games(lines), 1):
+        results["total_games"] += 1
         game_report = {
             "game_number": i,
             "date": game["date"],
@@ -343,39 +324,54 @@ def test_name_resolution():
 
 
 def main():
-    # Test name resolution first
-    test_name_resolution()
-
-    # Read raw game data
-    with open("game_history.txt", "r", encoding="utf-8") as f:
-        raw_data = f.read()
-
-    # Perform dry run
-    results = dry_run(raw_data)
-    print_dry_run_results(results)
-
-    # Ask for confirmation before proceeding
-    logger.warning(
-        "\nIssues were found in the game data. Please review before proceeding."
-    )
-    proceed = input("\nWould you like to proceed with the import anyway? (yes/no): ")
-    if proceed.lower() != "yes":
-        logger.info("Import cancelled.")
-        return
-
-    # Proceed with actual import if confirmed
+    """
+    Usage: python migrate_games.py [history_file|-] [--dry-run] [--skip-invalid]
+    The history is read line by line; '-' reads it from stdin.
+    --dry-run shows the per-game preview and computes the import without
+    writing. Otherwise games are written as they stream in, with progress
+    logged per batch, so memory stays flat however long the history is.
+    """
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    flags = {arg for arg in sys.argv[1:] if arg.startswith("--")}
+    path = args[0] if args else "game_history.txt"
+    import_dry_run = "--dry-run" in flags
+
+    if import_dry_run:
+        # Test name resolution first
+        test_name_resolution()
+
+        # The preview keeps every game in memory and stdin can only be read
+        # once, so it is only shown for files
+        if path != "-":
+            with open_history(path) as lines:
+                results = dry_run(lines)
+            print_dry_run_results(results)
+
+    # Games are parsed, validated and written as they stream in
     logger.info("\nProceeding with database import...")
     processor = GameHistoryProcessor()
-    games = processor.process_game_data(raw_data)
-    results = processor.save_games(games)
+    with open_history(path) as lines:
+        games = iter_valid_games(
+            processor.iter_games(lines), skip_invalid="--skip-invalid" in flags
+        )
+        results = processor.save_games(games, dry_run=import_dry_run)
 
     # Log final results
     logger.info(f"\nImport completed:")
-    logger.info(f"Successfully saved {len(results['success'])} games")
+    logger.info(f"Successfully saved {results['saved']} games")
+    if results["write_errors"]:
+        logger.error(
+            f"{results['write_errors']} stats/rating writes failed, see errors above"
+        )
     if results["failed"]:
         logger.error(f"Failed to save {len(results['failed'])} games")
-        for game in results["failed"]:
+        for game in results["failed"][:MAX_FAILED_LISTED]:
             logger.error(f"Failed game from {game['date']}")
+        if len(results["failed"]) > MAX_FAILED_LISTED:
+            logger.error(
+                f"... and {len(results['failed']) - MAX_FAILED_LISTED} more, "
+                "see the errors above"
+            )
 
 
 if __name__ == "__main__":
@@ -1,12 +1,49 @@
+from models.game_player import GamePlayer
+
+TEAM_NAMES = ("Team A", "Team B")
+
+
 class SoccerGame:
+    """
+    State of one game in a group chat.
+    The roster is indexed by player id: membership, team and captain checks
+    are dict lookups, and the players still available in the draft are kept
+    in their own ordered pool.
+    """
+
+    __slots__ = (
+        "_players",
+        "_captains",
+        "_teams",
+        "_team_of",
+        "_undrafted",
+        "max_players",
+        "current_selector",
+        "game_state",
+        "mvp_votes",
+        "voting_players",
+        "draft_method",
+        "selection_round",
+        "score",
+        "db_game_id",
+        "join_message_id",
+        "teams_message_id",
+        "team_b_white",
+        "captain_selection_method",
+        "version",
+    )
+
     def __init__(self):
-        self.players = []
+        self._players = {}  # player_id -> player, in join order
+        self._captains = []  # [Team A captain, Team B captain]
+        self._teams = {name: {} for name in TEAM_NAMES}  # drafted players, no captains
+        self._team_of = {}  # player_id -> team name, captains included
+        self._undrafted = {}  # player_id -> player not yet a captain or picked
         self.max_players = 14
-        self.captains = []
-        self.teams = {"Team A": [], "Team B": []}
         self.current_selector = None
         self.game_state = "WAITING"
         self.mvp_votes = {}
+        self.voting_players = []
         self.draft_method = None
         self.selection_round = 0
         self.score = {"Team A": None, "Team B": None}
@@ -15,3 +52,171 @@ class SoccerGame:
         self.teams_message_id = None
         self.team_b_white = None
         self.captain_selection_method = None
+        self.version = 0  # bumped on every change that has to be persisted
+
+    # Roster
+
+    @property
+    def players(self) -> list:
+        return list(self._players.values())
+
+    @players.setter
+    def players(self, players):
+        """Replace the whole roster, clearing captains and teams"""
+        self._players = {}
+        self._captains = []
+        self._teams = {name: {} for name in TEAM_NAMES}
+        self._team_of = {}
+        self._undrafted = {}
+        for player in players:
+            self.add_player(player)
+
+    @property
+    def player_count(self) -> int:
+        return len(self._players)
+
+    def has_player(self, player_id) -> bool:
+        return player_id in self._players
+
+    def get_player(self, player_id):
+        return self._players.get(player_id)
+
+    def add_player(self, player) -> None:
+        self._players[player.id] = player
+        self._undrafted[player.id] = player
+
+    def remove_player(self, player_id):
+        """
+        Remove a player from the roster, and from their team if they were
+        drafted, and return it, or None if absent
+        """
+        player = self._players.pop(player_id, None)
+        self._undrafted.pop(player_id, None)
+        team_name = self._team_of.pop(player_id, None)
+        if team_name:
+            self._teams[team_name].pop(player_id, None)
+        return player
+
+    # Captains
+
+    @property
+    def captains(self) -> list:
+        return list(self._captains)
+
+    @captains.setter
+    def captains(self, captains):
+        for captain in self._captains:
+            self._team_of.pop(captain.id, None)
+        self._captains = []
+        self._undrafted = {
+            player_id: player
+            for player_id, player in self._players.items()
+            if player_id not in self._team_of
+        }
+        for captain in captains:
+            self.add_captain(captain)
+
+    def add_captain(self, player) -> None:
+        """Make player the captain of the next team without one"""
+        team_name = TEAM_NAMES[len(self._captains)]
+        self._captains.append(player)
+        self._team_of[player.id] = team_name
+        self._undrafted.pop(player.id, None)
+
+    def is_captain(self, player_id) -> bool:
+        return any(captain.id == player_id for captain in self._captains)
+
+    # Teams
+
+    @property
+    def teams(self) -> dict:
+        """Drafted players per team in pick order (captains not included)"""
+        return {name: list(members.values()) for name, members in self._teams.items()}
+
+    @property
+    def undrafted_players(self) -> list:
+        return list(self._undrafted.values())
+
+    def is_undrafted(self, player_id) -> bool:
+        return player_id in self._undrafted
+
+    def assign_player(self, team_name, player) -> None:
+        self._teams[team_name][player.id] = player
+        self._team_of[player.id] = team_name
+        self._undrafted.pop(player.id, None)
+
+    def team_of(self, player_id) -> str | None:
+        """Team name of a captain or drafted player, None if not on a team"""
+        return self._team_of.get(player_id)
+
+    def team_size(self, team_name) -> int:
+        """Number of drafted players in a team, captain excluded"""
+        return len(self._teams[team_name])
+
+    def external_count(self, team_name) -> int:
+        """Number of external players (negative ids) on a team, captain included"""
+        return sum(
+            1
+            for player_id, team in self._team_of.items()
+            if player_id < 0 and team == team_name
+        )
+
+    # Persistence
+
+    def to_snapshot(self) -> dict:
+        """
+        JSON-ready state of the whole game, players referenced by id.
+        Restored by from_snapshot, whatever phase the game is in.
+        """
+        return {
+            "version": self.version,
+            "game_state": self.game_state,
+            "max_players": self.max_players,
+            "players": [[p.id, p.display_name] for p in self._players.values()],
+            "captains": [captain.id for captain in self._captains],
+            "teams": {name: list(members) for name, members in self._teams.items()},
+            "current_selector": (
+                self.current_selector.id if self.current_selector else None
+            ),
+            "draft_method": self.draft_method,
+            "selection_round": self.selection_round,
+            "captain_selection_method": self.captain_selection_method,
+            "team_b_white": self.team_b_white,
+            "score": self.score,
+            "db_game_id": self.db_game_id,
+            "mvp_votes": [[voter, voted] for voter, voted in self.mvp_votes.items()],
+            "voting_players": [p.id for p in self.voting_players],
+            "join_message_id": self.join_message_id,
+            "teams_message_id": self.teams_message_id,
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: dict) -> "SoccerGame":
+        """Rebuild a game from to_snapshot output, players as GamePlayer"""
+        game = cls()
+        game.players = [
+            GamePlayer(id=player_id, display_name=display_name)
+            for player_id, display_name in snapshot["players"]
+        ]
+        game.captains = [game.get_player(pid) for pid in snapshot["captains"]]
+        for team_name, player_ids in snapshot["teams"].items():
+            for player_id in player_ids:
+                game.assign_player(team_name, game.get_player(player_id))
+
+        game.version = snapshot["version"]
+        game.game_state = snapshot["game_state"]
+        game.max_players = snapshot["max_players"]
+        game.current_selector = game.get_player(snapshot["current_selector"])
+        game.draft_method = snapshot["draft_method"]
+        game.selection_round = snapshot["selection_round"]
+        game.captain_selection_method = snapshot["captain_selection_method"]
+        game.team_b_white = snapshot["team_b_white"]
+        game.score = snapshot["score"]
+        game.db_game_id = snapshot["db_game_id"]
+        game.mvp_votes = {voter: voted for voter, voted in snapshot["mvp_votes"]}
+        game.voting_players = [
+            game.get_player(pid) for pid in snapshot["voting_players"]
+        ]
+        game.join_message_id = snapshot["join_message_id"]
+        game.teams_message_id = snapshot["teams_message_id"]
+        return game
@@ -3,6 +3,8 @@ class GamePlayer:
     Game Player model representing a loaded Player in the game.
     """
 
+    __slots__ = ("id", "telegram_user", "display_name")
+
     def __init__(self, id, telegram_user=None, display_name=None):
         self.id = id
         self.telegram_user = telegram_user
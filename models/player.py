@@ -4,6 +4,25 @@ class Player:
     Can be instantiated either from a Telegram user or from database records.
     """
 
+    __slots__ = (
+        "id",
+        "username",
+        "display_name",
+        "elo_rating",
+        "games_played",
+        "games_won",
+        "games_lost",
+        "games_drawn",
+        "current_streak",
+        "best_streak",
+        "worst_streak",
+        "unbeaten_streak",
+        "best_unbeaten_streak",
+        "times_captain",
+        "times_mvp",
+        "last_played",
+    )
+
     def __init__(self, telegram_user=None, display_name=None):
         if telegram_user:
             self.id = telegram_user.id
@@ -32,7 +51,7 @@ class Player:
         Returns:
             Player: New Player instance with database values
         """
-        player = cls()  # Create empty player instance
+        player = cls.__new__(cls)  # Empty instance, skips __init__
         player.id = db_record["id"]
         player.username = db_record["username"]
         player.elo_rating = db_record["elo_rating"]
@@ -0,0 +1,125 @@
+"""
+Microbenchmark for the slotted models.
+Compares Player.from_db against a dict-backed copy of the previous model:
+construction throughput and memory held by a batch of instances.
+
+Run from the repository root: PYTHONPATH=. python scripts/benchmark_models.py
+"""
+
+import logging
+import timeit
+import tracemalloc
+
+from models.player import Player
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 10_000
+
+SAMPLE_RECORD = {
+    "id": 123456789,
+    "username": "sample_user",
+    "display_name": "Sample",
+    "elo_rating": 1234,
+    "games_played": 42,
+    "games_won": 20,
+    "games_lost": 15,
+    "games_drawn": 7,
+    "current_streak": 2,
+    "best_streak": 5,
+    "worst_streak": -3,
+    "unbeaten_streak": 4,
+    "best_unbeaten_streak": 8,
+    "times_captain": 6,
+    "times_mvp": 3,
+    "last_played": "2024-06-28T20:00:00",
+}
+
+
+class DictPlayer:
+    """The dict-backed Player this benchmark compares against"""
+
+    def __init__(self, telegram_user=None, display_name=None):
+        if telegram_user:
+            self.id = telegram_user.id
+            self.username = telegram_user.username
+            self.display_name = display_name
+            self.elo_rating = 1200  # Default for new players
+            self.games_played = 0
+            self.games_won = 0
+            self.games_lost = 0
+            self.games_drawn = 0
+            self.current_streak = 0
+            self.best_streak = 0
+            self.worst_streak = 0
+            self.unbeaten_streak = 0
+            self.best_unbeaten_streak = 0
+            self.times_captain = 0
+            self.times_mvp = 0
+            self.last_played = None
+
+    @classmethod
+    def from_db(cls, db_record):
+        player = cls()
+        player.id = db_record["id"]
+        player.username = db_record["username"]
+        player.elo_rating = db_record["elo_rating"]
+        player.games_played = db_record["games_played"]
+        player.games_won = db_record["games_won"]
+        player.games_lost = db_record["games_lost"]
+        player.games_drawn = db_record["games_drawn"]
+        player.current_streak = db_record["current_streak"]
+        player.best_streak = db_record["best_streak"]
+        player.worst_streak = db_record["worst_streak"]
+        player.unbeaten_streak = db_record["unbeaten_streak"]
+        player.best_unbeaten_streak = db_record["best_unbeaten_streak"]
+        player.times_captain = db_record["times_captain"]
+        player.times_mvp = db_record["times_mvp"]
+        player.last_played = db_record["last_played"]
+        player.display_name = db_record["display_name"]
+        return player
+
+
+def measure_memory(model) -> int:
+    """Bytes allocated while materialising BATCH_SIZE instances"""
+    records = [dict(SAMPLE_RECORD, id=i) for i in range(BATCH_SIZE)]
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    players = [model.from_db(record) for record in records]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del players
+    return after - before
+
+
+def measure_throughput(model, repeat=5) -> float:
+    """Best-of-N instances created per second"""
+    best = min(
+        timeit.repeat(
+            lambda: model.from_db(SAMPLE_RECORD), number=BATCH_SIZE, repeat=repeat
+        )
+    )
+    return BATCH_SIZE / best
+
+
+def main():
+    results = {}
+    for name, model in [("dict-backed", DictPlayer), ("slotted", Player)]:
+        results[name] = (measure_memory(model), measure_throughput(model))
+        memory, throughput = results[name]
+        logger.info(
+            f"{name:>12}: {memory / BATCH_SIZE:7.1f} bytes/instance, "
+            f"{throughput:,.0f} from_db/s"
+        )
+
+    old_memory, old_throughput = results["dict-backed"]
+    new_memory, new_throughput = results["slotted"]
+    logger.info(
+        f"Memory: {100 * (1 - new_memory / old_memory):.1f}% less, "
+        f"throughput: {new_throughput / old_throughput:.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
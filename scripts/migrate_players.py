@@ -3,6 +3,7 @@ from typing import Dict, List, Set
 from database.base import BaseManager
 from database.player import PlayerDBManager
 from models.player import Player
+from services.alias_index import AliasIndex
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -47,13 +48,33 @@ class PlayerMigration:
             2026: {"name": "Zé Fernandes", "aliases": {"zé fernandes", "ze fernandes"}},
         }
 
-        # Create reverse mapping for name resolution
-        self.name_mapping = {}
+        self.alias_index = self._build_alias_index()
+
+    @property
+    def name_mapping(self) -> Dict[str, int]:
+        """Folded alias -> player id"""
+        return self.alias_index.aliases
+
+    def _build_alias_index(self) -> AliasIndex:
+        """
+        Index the registered players and the player_aliases table on top of
+        the hard-coded data, so new aliases only need a database row
+        """
+        index = AliasIndex()
+        try:
+            display_names = self.player_db_manager.get_display_names()
+            aliases = self.player_db_manager.get_player_aliases()
+        except Exception as e:
+            logger.warning(f"Could not load aliases from the database: {e}")
+            display_names, aliases = {}, []
+
+        for player_id, display_name in display_names.items():
+            index.add_player(player_id, display_name)
         for player_id, data in self.player_data.items():
-            for alias in data["aliases"]:
-                self.name_mapping[alias] = player_id
-            # Also map the canonical name
-            self.name_mapping[data["name"].lower()] = player_id
+            index.add_player(player_id, data["name"], data["aliases"])
+        for row in aliases:
+            index.add_alias(row["alias"], row["player_id"])
+        return index
 
     def register_players(self) -> Dict[str, List[str]]:
         """Register all players in the database"""
@@ -90,17 +111,27 @@ class PlayerMigration:
                 results["failed"].append(player_data["name"])
                 logger.error(f"Error registering {player_data['name']}: {e}")
 
+        # Persist the aliases so the index can be rebuilt from the database
+        try:
+            self.player_db_manager.upsert_aliases(
+                {
+                    alias: player_id
+                    for player_id, data in self.player_data.items()
+                    for alias in data["aliases"]
+                }
+            )
+        except Exception as e:
+            logger.error(f"Error saving player aliases: {e}")
+
         return results
 
     def resolve_player_name(self, name: str) -> tuple[int | None, str | None]:
         """
-        Resolve a player name to their ID and canonical name
+        Resolve a player name to their ID and canonical name, tolerating
+        accents and small typos
         Returns (player_id, canonical_name) or (None, None) if not found
         """
-        player_id = self.name_mapping.get(name.lower())
-        if player_id:
-            return player_id, self.player_data[player_id]["name"]
-        return None, None
+        return self.alias_index.resolve(name)
 
     def get_all_known_names(self) -> Set[str]:
         """Get set of all known player names and aliases"""
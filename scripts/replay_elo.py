@@ -0,0 +1,24 @@
+import logging
+import sys
+from database.elo import EloDBManager
+from services.elo_replay import replay_ratings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Usage: python scripts/replay_elo.py [--dry-run] [--from-checkpoint]"""
+    args = sys.argv[1:]
+    ratings = replay_ratings(
+        EloDBManager(),
+        dry_run="--dry-run" in args,
+        from_checkpoint="--from-checkpoint" in args,
+    )
+
+    for player_id, rating in sorted(ratings.items(), key=lambda r: -r[1])[:10]:
+        logger.info(f"{player_id}: {rating}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+End-to-end latency check for webhook mode without touching the network.
+Starts a fake Bot API server, points the bot at it with base_url, POSTs
+updates to the webhook endpoint and measures the time from each POST until
+the bot's reply reaches the fake API.
+
+By default the bot only answers /ping, which measures the webhook, update
+processing and outbound scheduler. With --bot the real handlers are used
+(needs the Supabase settings from .env).
+
+Run from the repository root:
+    PYTHONPATH=. python scripts/webhook_harness.py [--updates 100] [--bot]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import time
+
+from aiohttp import ClientSession, web
+from telegram import Update
+from telegram.ext import Application, CommandHandler
+
+from services.outbound import OutboundScheduler
+from services.update_processor import ChatSerializedUpdateProcessor
+from services.webhook import SECRET_HEADER, WebhookServer
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+FAKE_TOKEN = "123456:harness"
+SECRET = "harness-secret"
+HOST = "127.0.0.1"
+
+
+class FakeBotAPI:
+    """Answers Bot API calls like Telegram would and records when they arrive"""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.replies = {}  # chat_id -> time the first message for it arrived
+        self.calls = 0
+        self._message_id = 0
+        self._runner = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{HOST}:{self.port}/bot"
+
+    async def start(self) -> None:
+        server = web.Application()
+        server.router.add_post("/bot{token}/{method}", self.handle)
+        self._runner = web.AppRunner(server, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, HOST, self.port).start()
+
+    async def stop(self) -> None:
+        await self._runner.cleanup()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        data = {}
+        for key, value in (await request.post()).items():
+            try:
+                data[key] = json.loads(value)
+            except (TypeError, ValueError):
+                data[key] = value
+        self.calls += 1
+
+        if method == "getMe":
+            result = {
+                "id": 123456,
+                "is_bot": True,
+                "first_name": "Harness",
+                "username": "harness_bot",
+            }
+        elif method in ("sendMessage", "editMessageText"):
+            chat_id = int(data["chat_id"])
+            self.replies.setdefault(chat_id, time.perf_counter())
+            self._message_id += 1
+            result = {
+                "message_id": data.get("message_id", self._message_id),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "group"},
+                "text": data.get("text", ""),
+            }
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+
+async def ping(update: Update, context) -> None:
+    await update.message.reply_text("pong")
+
+
+def build_ping_application(base_url: str, concurrent_updates: int) -> Application:
+    app = (
+        Application.builder()
+        .token(FAKE_TOKEN)
+        .base_url(base_url)
+        .rate_limiter(OutboundScheduler())
+        .concurrent_updates(ChatSerializedUpdateProcessor(concurrent_updates))
+        .build()
+    )
+    app.add_handler(CommandHandler("ping", ping))
+    return app
+
+
+def command_update(update_id: int, chat_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": f"User{chat_id}"},
+            "text": text,
+            "entities": [
+                {"type": "bot_command", "offset": 0, "length": len(text.split()[0])}
+            ],
+        },
+    }
+
+
+async def run(args) -> None:
+    fake_api = FakeBotAPI(args.api_port)
+    await fake_api.start()
+
+    if args.bot:
+        os.environ.setdefault("TELEGRAM_BOT_TOKEN", FAKE_TOKEN)
+        from main import build_application
+
+        app = build_application(
+            token=FAKE_TOKEN,
+            base_url=fake_api.base_url,
+            concurrent_updates=args.concurrency,
+        )
+        command = "/stats"
+    else:
+        app = build_ping_application(fake_api.base_url, args.concurrency)
+        command = "/ping"
+
+    server = WebhookServer(app, SECRET, host=HOST, port=args.port)
+    url = f"http://{HOST}:{args.port}{server.path}"
+
+    async with app:
+        await app.start()
+        await server.start()
+        try:
+            async with ClientSession() as session:
+                async with session.post(url, json={}) as response:
+                    logger.info(f"Request without secret -> HTTP {response.status}")
+
+                sent_at = {}
+
+                async def post(update_id):
+                    chat_id = 100_000 + update_id
+                    sent_at[chat_id] = time.perf_counter()
+                    async with session.post(
+                        url,
+                        json=command_update(update_id, chat_id, command),
+                        headers={SECRET_HEADER: SECRET},
+                    ) as response:
+                        response.raise_for_status()
+
+                started = time.perf_counter()
+                await asyncio.gather(*(post(i) for i in range(1, args.updates + 1)))
+
+                deadline = time.perf_counter() + args.timeout
+                while len(fake_api.replies) < args.updates:
+                    if time.perf_counter() > deadline:
+                        break
+                    await asyncio.sleep(0.01)
+                elapsed = time.perf_counter() - started
+        finally:
+            await server.stop()
+            await app.stop()
+            await fake_api.stop()
+
+    latencies = sorted(
+        (fake_api.replies[chat_id] - sent) * 1000
+        for chat_id, sent in sent_at.items()
+        if chat_id in fake_api.replies
+    )
+    logger.info(f"Replies: {len(latencies)}/{args.updates} in {elapsed:.2f}s")
+    logger.info(f"Bot API calls: {fake_api.calls}")
+    if latencies:
+        logger.info(
+            f"Latency ms: p50 {statistics.median(latencies):.1f}, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f}, "
+            f"max {latencies[-1]:.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--updates", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--api-port", type=int, default=8081)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--bot", action="store_true", help="use the real handlers")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+from collections import defaultdict
+import unicodedata
+
+
+def normalize_name(name: str) -> str:
+    """Case- and accent-folded form of a name: 'Zé  Fernandes' -> 'ze fernandes'"""
+    decomposed = unicodedata.normalize("NFKD", name.casefold())
+    folded = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(folded.split())
+
+
+def _ngrams(name: str, n: int = 3) -> set:
+    padded = f" {name} "
+    return {padded[i : i + n] for i in range(len(padded) - n + 1)}
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, giving up with limit + 1 once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class AliasIndex:
+    """
+    Name -> player lookup used when importing game history.
+    Names and aliases are stored accent-folded, so exact matches are a
+    single dict lookup. Unknown names fall back to a fuzzy match: trigram
+    overlap picks a few candidates, which are then checked by edit distance.
+    Fuzzy results, misses included, are cached.
+    """
+
+    def __init__(self, min_similarity: float = 0.3, max_candidates: int = 5):
+        self.min_similarity = min_similarity
+        self.max_candidates = max_candidates
+        self.aliases = {}  # folded alias -> player_id
+        self.names = {}  # player_id -> canonical name
+        self._ngram_index = defaultdict(set)  # trigram -> folded aliases
+        self._fuzzy_cache = {}
+
+    def __len__(self) -> int:
+        return len(self.aliases)
+
+    def add_player(self, player_id: int, name: str, aliases=()) -> None:
+        """Register a player's canonical name, which is also an alias"""
+        self.names[player_id] = name
+        self.add_alias(name, player_id)
+        for alias in aliases:
+            self.add_alias(alias, player_id)
+
+    def add_alias(self, alias: str, player_id: int) -> None:
+        key = normalize_name(alias)
+        if not key:
+            return
+        self.aliases[key] = player_id
+        for gram in _ngrams(key):
+            self._ngram_index[gram].add(key)
+        self._fuzzy_cache.clear()
+
+    def resolve(self, name: str) -> tuple[int | None, str | None]:
+        """Return (player_id, canonical_name), or (None, None) if unknown"""
+        key = normalize_name(name)
+        player_id = self.aliases.get(key)
+        if player_id is None:
+            if key not in self._fuzzy_cache:
+                self._fuzzy_cache[key] = self._fuzzy_match(key)
+            player_id = self._fuzzy_cache[key]
+        if player_id is None:
+            return None, None
+        return player_id, self.names.get(player_id)
+
+    def _fuzzy_match(self, key: str) -> int | None:
+        """
+        Closest alias within a small edit distance (1, or 2 for names of 8+
+        characters). Ambiguous matches between different players return None.
+        """
+        grams = _ngrams(key)
+        shared = defaultdict(int)
+        for gram in grams:
+            for alias in self._ngram_index.get(gram, ()):
+                shared[alias] += 1
+
+        candidates = sorted(
+            (
+                (count / len(grams | _ngrams(alias)), alias)
+                for alias, count in shared.items()
+            ),
+            reverse=True,
+        )[: self.max_candidates]
+
+        limit = 2 if len(key) >= 8 else 1
+        best_distance, best_ids = limit + 1, set()
+        for similarity, alias in candidates:
+            if similarity < self.min_similarity:
+                break
+            distance = _edit_distance(key, alias, limit)
+            if distance < best_distance:
+                best_distance, best_ids = distance, {self.aliases[alias]}
+            elif distance == best_distance:
+                best_ids.add(self.aliases[alias])
+
+        if best_distance > limit or len(best_ids) != 1:
+            return None
+        return best_ids.pop()
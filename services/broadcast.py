@@ -0,0 +1,31 @@
+import asyncio
+from telegram.error import TelegramError
+
+
+async def broadcast(send, recipients, max_concurrency=8, limiter=None):
+    """
+    Call `await send(recipient)` for every recipient concurrently, with at most
+    `max_concurrency` requests in flight.
+    Requests made through the bot already go through the OutboundScheduler's
+    rate limits and flood-control retries, so nothing else is throttled by
+    default; pass a TokenBucket as `limiter` for sends that bypass it.
+    Returns (succeeded, failed): the recipients that were reached and
+    (recipient, error) pairs for the ones that weren't, both in input order.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def deliver(recipient):
+        async with semaphore:
+            if limiter:
+                await limiter.acquire()
+            try:
+                await send(recipient)
+            except TelegramError as e:
+                return recipient, e
+            return recipient, None
+
+    results = await asyncio.gather(*(deliver(r) for r in recipients))
+
+    succeeded = [recipient for recipient, error in results if error is None]
+    failed = [(recipient, error) for recipient, error in results if error is not None]
+    return succeeded, failed
@@ -0,0 +1,266 @@
+from typing import Dict, Iterable, List, Tuple
+import itertools
+import logging
+import time
+import numpy as np
+
+from database.elo import EloConfig
+
+logger = logging.getLogger(__name__)
+
+
+class EloReplayEngine:
+    """
+    Recomputes ratings from scratch by applying every game in order, with the
+    same rules as EloDBManager.calculate_game_adjustments.
+
+    Games are first encoded into flat NumPy arrays (one entry per registered
+    participation, players mapped to dense slots). The replay loop then works
+    on slot-indexed rating arrays, so each game costs a handful of vector ops.
+
+    Each game is a dict shaped like a `games` row with embedded `game_players`:
+    {"score_team_a", "score_team_b", "team_a_external_count",
+     "team_b_external_count", "game_players": [{"player_id", "team", ...}]}
+    """
+
+    def __init__(self, config: EloConfig | None = None):
+        self.config = config or EloConfig()
+        # Games replayed with history since the last snapshot; kept across
+        # calls so batches of one import share the snapshot schedule
+        self.games_since_snapshot = 0
+
+    def replay(
+        self, games: Iterable[Dict], initial_ratings: Dict[int, int] | None = None
+    ) -> Dict[int, int]:
+        """Apply all games in order and return the final rating of every player seen"""
+        ratings, _, _ = self._replay(games, initial_ratings, record_history=False)
+        return ratings
+
+    def replay_with_history(
+        self, games: Iterable[Dict], initial_ratings: Dict[int, int] | None = None
+    ) -> Tuple[Dict[int, int], List[Dict], List[Dict]]:
+        """
+        Like replay, but also return the rating_history rows of every game and
+        the rating_snapshots checkpoints due along the way.
+        """
+        return self._replay(games, initial_ratings, record_history=True)
+
+    def _replay(self, games, initial_ratings, record_history):
+        encoded = self._encode(games)
+        slot_ids = encoded["slot_ids"]
+
+        ratings = np.full(len(slot_ids), self.config.default_rating, dtype=np.float64)
+        for player_id, rating in (initial_ratings or {}).items():
+            slot = encoded["slots"].get(player_id)
+            if slot is not None:
+                ratings[slot] = rating
+
+        history, snapshots = self._run(
+            encoded, ratings, initial_ratings or {}, record_history
+        )
+
+        result = dict(initial_ratings or {})
+        result.update(self._ratings_by_id(slot_ids, ratings))
+        return result, history, snapshots
+
+    @staticmethod
+    def _ratings_by_id(slot_ids, ratings: np.ndarray) -> Dict[int, int]:
+        return {
+            player_id: int(ratings[slot]) for slot, player_id in enumerate(slot_ids)
+        }
+
+    def _encode(self, games: Iterable[Dict]) -> Dict:
+        """Flatten games into per-participation arrays and per-game offsets"""
+        slots = {}
+        slot_ids = []
+        part_slot, part_team_a, part_games_played = [], [], []
+        offsets = [0]
+        game_ids, played_at = [], []
+        scores_a, scores_b, externals_a, externals_b = [], [], [], []
+
+        for game in games:
+            if game.get("score_team_a") is None or game.get("score_team_b") is None:
+                continue
+
+            for participation in game.get("game_players") or []:
+                player_id = participation["player_id"]
+                if player_id <= 0:
+                    continue
+                slot = slots.get(player_id)
+                if slot is None:
+                    slot = slots[player_id] = len(slot_ids)
+                    slot_ids.append(player_id)
+                part_slot.append(slot)
+                part_team_a.append(participation["team"] == "A")
+                part_games_played.append(participation.get("games_played") or 0)
+
+            offsets.append(len(part_slot))
+            game_ids.append(game.get("id"))
+            played_at.append(game.get("played_at"))
+            scores_a.append(game["score_team_a"])
+            scores_b.append(game["score_team_b"])
+            externals_a.append(game.get("team_a_external_count") or 0)
+            externals_b.append(game.get("team_b_external_count") or 0)
+
+        return {
+            "slots": slots,
+            "slot_ids": slot_ids,
+            "part_slot": np.array(part_slot, dtype=np.int64),
+            "part_team_a": np.array(part_team_a, dtype=bool),
+            "part_k": self._base_k(np.array(part_games_played, dtype=np.int64)),
+            "offsets": np.array(offsets, dtype=np.int64),
+            "game_ids": game_ids,
+            "played_at": played_at,
+            "scores_a": np.array(scores_a, dtype=np.int64),
+            "scores_b": np.array(scores_b, dtype=np.int64),
+            "externals_a": np.array(externals_a, dtype=np.int64),
+            "externals_b": np.array(externals_b, dtype=np.int64),
+        }
+
+    def _base_k(self, games_played: np.ndarray) -> np.ndarray:
+        """Experience-based K-factor, see EloDBManager._calculate_k_factor"""
+        return np.where(
+            games_played < 10,
+            self.config.max_k,
+            np.where(games_played < 20, self.config.base_k, self.config.min_k),
+        ).astype(np.float64)
+
+    def _run(
+        self,
+        encoded: Dict,
+        ratings: np.ndarray,
+        initial_ratings: Dict[int, int],
+        record_history: bool,
+    ) -> Tuple[List[Dict], List[Dict]]:
+        config = self.config
+        default = float(config.default_rating)
+        offsets = encoded["offsets"]
+        scores_a, scores_b = encoded["scores_a"], encoded["scores_b"]
+        externals_a, externals_b = encoded["externals_a"], encoded["externals_b"]
+
+        # Everything that doesn't depend on current ratings, computed for all games at once
+        actual_a = np.where(
+            scores_a > scores_b, 1.0, np.where(scores_b > scores_a, 0.0, 0.5)
+        )
+        goal_factor = 1 + np.abs(scores_a - scores_b) * config.goal_difference_factor
+        external_factor = 0.5 ** (externals_a + externals_b)
+
+        part_slot = encoded["part_slot"]
+        part_team_a = encoded["part_team_a"]
+        part_k = encoded["part_k"]
+        slot_ids, game_ids = encoded["slot_ids"], encoded["game_ids"]
+        recorded = []  # (game index, slots, before, after, k, expected) per game
+        snapshots = []
+
+        for game in range(len(offsets) - 1):
+            start, end = offsets[game], offsets[game + 1]
+            slots = part_slot[start:end]
+            on_a = part_team_a[start:end]
+            current = ratings[slots]
+
+            ext_a, ext_b = externals_a[game], externals_b[game]
+            size_a = np.count_nonzero(on_a) + ext_a
+            size_b = len(slots) - np.count_nonzero(on_a) + ext_b
+            team_a_rating = (
+                (current[on_a].sum() + ext_a * default) / size_a if size_a else default
+            )
+            team_b_rating = (
+                (current[~on_a].sum() + ext_b * default) / size_b if size_b else default
+            )
+
+            exp_a = 1 / (1 + 10 ** ((team_b_rating - team_a_rating) / 400))
+            delta = np.where(on_a, actual_a[game] - exp_a, exp_a - actual_a[game])
+            k_factor = part_k[start:end] * external_factor[game]
+            change = k_factor * goal_factor[game] * delta
+
+            # np.rint rounds half to even, same as Python's round()
+            ratings[slots] = np.rint(current + change)
+
+            if not record_history:
+                continue
+
+            expected = np.where(on_a, exp_a, 1 - exp_a)
+            recorded.append((game, slots, current, ratings[slots], k_factor, expected))
+
+            self.games_since_snapshot += 1
+            game_id = game_ids[game]
+            if game_id and self.games_since_snapshot >= config.snapshot_interval:
+                self.games_since_snapshot = 0
+                snapshot_ratings = dict(initial_ratings)
+                snapshot_ratings.update(self._ratings_by_id(slot_ids, ratings))
+                snapshots.append(
+                    {
+                        "game_id": game_id,
+                        "played_at": encoded["played_at"][game],
+                        "ratings": {str(k): v for k, v in snapshot_ratings.items()},
+                    }
+                )
+
+        history = [
+            {
+                "player_id": slot_ids[slot],
+                "game_id": game_ids[game],
+                "rating_before": int(before),
+                "rating_after": int(after),
+                "k_factor": float(k),
+                "expected_score": float(exp),
+            }
+            for game, slots, befores, afters, ks, exps in recorded
+            for slot, before, after, k, exp in zip(slots, befores, afters, ks, exps)
+        ]
+        return history, snapshots
+
+
+def replay_ratings(
+    elo_db_manager, dry_run: bool = False, from_checkpoint: bool = False
+) -> Dict[int, int]:
+    """
+    Recompute every player's rating from the game history and write the
+    ratings, their rating_history rows and snapshots back in bulk.
+    With from_checkpoint the replay starts from the latest snapshot instead
+    of game zero. Players without games go back to the default rating.
+    """
+    config = elo_db_manager.config
+    engine = EloReplayEngine(config)
+    snapshot = elo_db_manager.get_latest_snapshot() if from_checkpoint else None
+
+    started = time.perf_counter()
+    replayed, history, snapshots = engine.replay_with_history(
+        elo_db_manager.iter_rated_games(after=snapshot),
+        snapshot["ratings"] if snapshot else None,
+    )
+    logger.info(
+        f"Replayed {len(history)} rating changes for {len(replayed)} players "
+        f"in {time.perf_counter() - started:.3f}s"
+        + (f" (from snapshot of game {snapshot['game_id']})" if snapshot else "")
+    )
+
+    final_ratings = {
+        player_id: replayed.get(player_id, config.default_rating)
+        for player_id in elo_db_manager.get_all_player_ids()
+    }
+
+    if dry_run:
+        logger.info("Dry run, nothing written")
+        return final_ratings
+
+    elo_db_manager.write_rating_history(history)
+    elo_db_manager.write_snapshots(snapshots)
+    elo_db_manager.write_ratings(final_ratings)
+    logger.info(
+        f"Wrote ratings for {len(final_ratings)} players, "
+        f"{len(history)} history rows and {len(snapshots)} snapshots"
+    )
+    return final_ratings
+
+
+def ratings_at(elo_db_manager, played_at: str) -> Dict[int, int]:
+    """Everyone's rating just before played_at, replayed from the nearest checkpoint"""
+    snapshot = elo_db_manager.get_latest_snapshot(before=played_at)
+    games = itertools.takewhile(
+        lambda game: game["played_at"] < played_at,
+        elo_db_manager.iter_rated_games(after=snapshot),
+    )
+    return EloReplayEngine(elo_db_manager.config).replay(
+        games, snapshot["ratings"] if snapshot else None
+    )
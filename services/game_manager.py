@@ -1,46 +1,124 @@
+import asyncio
+import os
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.error import BadRequest, TelegramError
 from telegram.ext import ContextTypes
 from database.game import GameDBManager
 from models.game import SoccerGame
+from services.game_state_writer import GameStateWriter
 
 
 class GameManager:
     def __init__(self, game_db_manager: GameDBManager):
         self.game_db_manager = game_db_manager
+        self.state_writer = GameStateWriter(
+            game_db_manager,
+            interval=float(os.getenv("ACTIVE_GAME_FLUSH_INTERVAL", "2")),
+        )
         self.games = self.game_db_manager.load_active_games()
+        # Join message re-renders: chat_id -> pending task / last text sent
+        self.join_debounce = float(os.getenv("JOIN_MESSAGE_DEBOUNCE", "1"))
+        self._join_renders = {}
+        self._join_rendered = {}
+        # Teams message edits running in the background: chat_id -> task, and
+        # the chats whose teams changed since their last edit started
+        self._teams_renders = {}
+        self._teams_stale = set()
+        # voter_id -> chat_ids of the games where that player has an open ballot
+        self.voter_index = {}
+        for chat_id, game in self.games.items():
+            for player in game.voting_players:
+                self.register_voter(chat_id, player.id)
 
-    def create_game(self, chat_id) -> SoccerGame:
+    async def create_game(self, chat_id) -> SoccerGame:
         game = SoccerGame()
         self.games[chat_id] = game
-        self.game_db_manager.save_active_game_players(chat_id, game.players)
+        self.state_writer.mark_dirty(chat_id, game)
+        await self.state_writer.flush(chat_id)
         return game
 
+    def mark_dirty(self, chat_id) -> None:
+        """Persist the game in chat_id after a change (coalesced, see GameStateWriter)"""
+        game = self.games.get(chat_id)
+        if game:
+            self.state_writer.mark_dirty(chat_id, game)
+
     def get_game(self, chat_id) -> SoccerGame:
         return self.games.get(chat_id)
 
-    def remove_game(self, chat_id):
+    async def remove_game(self, chat_id):
         if chat_id in self.games:
-            self.game_db_manager.remove_active_game(chat_id)
-            del self.games[chat_id]
+            game = self.games.pop(chat_id)
+            self._unregister_voters(chat_id, game)
+            pending = self._join_renders.pop(chat_id, None)
+            if pending:
+                pending.cancel()
+            self._join_rendered.pop(chat_id, None)
+            self._cancel_teams_render(chat_id)
+            await self.state_writer.discard(chat_id)
+            await self.game_db_manager.aio.remove_active_game(chat_id)
+
+    def register_voter(self, chat_id, voter_id) -> None:
+        """Record that voter_id received a ballot for the game in chat_id"""
+        self.voter_index.setdefault(voter_id, set()).add(chat_id)
+
+    def find_voting_chat(self, voter_id, chat_id=None):
+        """
+        Return the chat whose ballot voter_id is answering.
+        Without a chat_id (old ballots) this only succeeds if the voter has a
+        single open ballot.
+        """
+        chats = self.voter_index.get(voter_id, ())
+        if chat_id is not None:
+            return chat_id if chat_id in chats else None
+        return next(iter(chats)) if len(chats) == 1 else None
+
+    def _unregister_voters(self, chat_id, game: SoccerGame) -> None:
+        for player in getattr(game, "voting_players", []):
+            chats = self.voter_index.get(player.id)
+            if chats:
+                chats.discard(chat_id)
+                if not chats:
+                    del self.voter_index[player.id]
 
     async def update_join_message(
-        self, chat_id: int, context: ContextTypes.DEFAULT_TYPE
+        self, chat_id: int, context: ContextTypes.DEFAULT_TYPE, force_new: bool = False
     ) -> None:
-        game = self.get_game(chat_id)
+        """
+        Refresh the roster message.
+        Normally the existing message is edited after a short debounce, so a
+        burst of joins and leaves results in a single edit showing all of
+        them. force_new reposts it immediately at the bottom of the chat.
+        """
+        if force_new:
+            pending = self._join_renders.pop(chat_id, None)
+            if pending:
+                pending.cancel()
+            await self._render_join_message(chat_id, context.bot, force_new=True)
+        elif chat_id not in self._join_renders:
+            self._join_renders[chat_id] = asyncio.create_task(
+                self._render_join_message_later(chat_id, context.bot)
+            )
 
-        if game.join_message_id:
-            try:
-                await context.bot.delete_message(
-                    chat_id=chat_id, message_id=game.join_message_id
-                )
-            except:
-                pass
+    async def _render_join_message_later(self, chat_id: int, bot) -> None:
+        await asyncio.sleep(self.join_debounce)
+        # Changes made from here on schedule a new render
+        self._join_renders.pop(chat_id, None)
+        try:
+            await self._render_join_message(chat_id, bot)
+        except Exception as e:
+            print(f"Error updating join message: {e}")
+
+    async def _render_join_message(self, chat_id: int, bot, force_new=False) -> None:
+        game = self.get_game(chat_id)
+        if not game:
+            return
 
         players_text = "Players joined:\n\n"
         for i, player in enumerate(game.players, 1):
             players_text += f"{i}. {player.display_name}\n"
 
-        players_text += f"\n{len(game.players)}/{game.max_players} players"
+        players_text += f"\n{game.player_count}/{game.max_players} players"
 
         keyboard = [
             [
@@ -48,18 +126,89 @@ class GameManager:
                 InlineKeyboardButton("Leave Game 🚪", callback_data="leave"),
             ]
         ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = (
+            InlineKeyboardMarkup(keyboard)
+            if game.player_count < game.max_players
+            else None
+        )
+
+        if game.join_message_id and not force_new:
+            # The keyboard only depends on the player count shown in the text
+            if self._join_rendered.get(chat_id) == players_text:
+                return
+            try:
+                await bot.edit_message_text(
+                    chat_id=chat_id,
+                    message_id=game.join_message_id,
+                    text=players_text,
+                    reply_markup=reply_markup,
+                )
+                self._join_rendered[chat_id] = players_text
+                return
+            except BadRequest as e:
+                if "not modified" in str(e).lower():
+                    self._join_rendered[chat_id] = players_text
+                    return
+                print(f"Error editing join message, sending a new one: {e}")
+
+        if game.join_message_id:
+            try:
+                await bot.delete_message(
+                    chat_id=chat_id, message_id=game.join_message_id
+                )
+            except TelegramError:
+                pass
 
-        message = await context.bot.send_message(
-            chat_id=chat_id,
-            text=players_text,
-            reply_markup=reply_markup if len(game.players) < game.max_players else None,
+        message = await bot.send_message(
+            chat_id=chat_id, text=players_text, reply_markup=reply_markup
         )
         game.join_message_id = message.message_id
+        self._join_rendered[chat_id] = players_text
+        self.mark_dirty(chat_id)
 
     async def update_teams_message(
         self, chat_id: int, context: ContextTypes.DEFAULT_TYPE, force_new: bool = False
     ) -> None:
+        """
+        Refresh the teams message.
+        Edits of the existing message run in the background, one at a time per
+        chat, so a draft pick doesn't wait for the group's rate limit; picks
+        made while an edit is queued are all shown by the next one. force_new
+        and the first render happen immediately.
+        """
+        game = self.get_game(chat_id)
+        if not game:
+            return
+
+        if force_new or not game.teams_message_id:
+            self._cancel_teams_render(chat_id)
+            await self._render_teams_message(chat_id, context.bot, force_new)
+            return
+
+        self._teams_stale.add(chat_id)
+        if chat_id not in self._teams_renders:
+            self._teams_renders[chat_id] = asyncio.create_task(
+                self._render_teams_message_later(chat_id, context.bot)
+            )
+
+    async def _render_teams_message_later(self, chat_id: int, bot) -> None:
+        try:
+            while chat_id in self._teams_stale:
+                self._teams_stale.discard(chat_id)
+                await self._render_teams_message(chat_id, bot)
+        except Exception as e:
+            print(f"Error updating teams message: {e}")
+        finally:
+            if self._teams_renders.get(chat_id) is asyncio.current_task():
+                del self._teams_renders[chat_id]
+
+    def _cancel_teams_render(self, chat_id: int) -> None:
+        self._teams_stale.discard(chat_id)
+        pending = self._teams_renders.pop(chat_id, None)
+        if pending:
+            pending.cancel()
+
+    async def _render_teams_message(self, chat_id: int, bot, force_new=False) -> None:
         game = self.get_game(chat_id)
         if not game:
             return
@@ -76,27 +225,21 @@ class GameManager:
 
         # Team A
         teams_text += f"Team A (Captain: {game.captains[0].display_name}){' - ' + team_a_color if team_a_color else ''}:\n"
-        team_a_players = [game.captains[0]] + game.teams["Team A"]
+        teams = game.teams
+        team_a_players = [game.captains[0]] + teams["Team A"]
         teams_text += "\n".join(f"• {p.display_name}" for p in team_a_players)
 
         # Team B
         teams_text += f"\n\nTeam B (Captain: {game.captains[1].display_name}){' - ' + team_b_color if team_b_color else ''}:\n"
-        team_b_players = [game.captains[1]] + game.teams["Team B"]
+        team_b_players = [game.captains[1]] + teams["Team B"]
         teams_text += "\n".join(f"• {p.display_name}" for p in team_b_players)
 
         # Add selection prompt if in selection state
         if game.game_state == "SELECTION":
             teams_text += f"\n\n{game.current_selector.display_name}'s turn to select"
-            remaining_players = [
-                p
-                for p in game.players
-                if p not in game.captains
-                and p not in game.teams["Team A"]
-                and p not in game.teams["Team B"]
-            ]
             keyboard = [
                 [InlineKeyboardButton(p.display_name, callback_data=f"select_{p.id}")]
-                for p in remaining_players
+                for p in game.undrafted_players
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
         else:
@@ -106,14 +249,14 @@ class GameManager:
             # Delete old message if it exists
             if game.teams_message_id:
                 try:
-                    await context.bot.delete_message(
+                    await bot.delete_message(
                         chat_id=chat_id, message_id=game.teams_message_id
                     )
                 except Exception as e:
                     print(f"Error deleting message: {e}")
 
             # Send new message
-            message = await context.bot.send_message(
+            message = await bot.send_message(
                 chat_id=chat_id, text=teams_text, reply_markup=reply_markup
             )
             game.teams_message_id = message.message_id
@@ -121,7 +264,7 @@ class GameManager:
             if game.teams_message_id:
                 try:
                     # Edit existing message
-                    await context.bot.edit_message_text(
+                    await bot.edit_message_text(
                         chat_id=chat_id,
                         message_id=game.teams_message_id,
                         text=teams_text,
@@ -130,13 +273,15 @@ class GameManager:
                 except Exception as e:
                     print(f"Error editing message: {e}")
                     # If editing fails, send a new one
-                    message = await context.bot.send_message(
+                    message = await bot.send_message(
                         chat_id=chat_id, text=teams_text, reply_markup=reply_markup
                     )
                     game.teams_message_id = message.message_id
             else:
                 # If no message exists yet, send a new one
-                message = await context.bot.send_message(
+                message = await bot.send_message(
                     chat_id=chat_id, text=teams_text, reply_markup=reply_markup
                 )
                 game.teams_message_id = message.message_id
+
+        self.mark_dirty(chat_id)
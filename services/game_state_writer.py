@@ -0,0 +1,99 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from models.game import SoccerGame
+
+
+class GameStateWriter:
+    """
+    Write-behind persistence of active games.
+    mark_dirty() only schedules a write: every change within `interval`
+    seconds of the last write for that chat is coalesced into one snapshot.
+    A change of game_state is written straight away so a restart always
+    resumes the right phase. Writes for one chat never overlap, and the
+    snapshot is taken when the write starts, so it is always the latest state.
+    Each snapshot carries the game's version and the database keeps the
+    newest one, so a write that lands late can't roll the game back.
+    """
+
+    def __init__(self, game_db_manager, interval: float = 2.0):
+        self.game_db_manager = game_db_manager
+        self.interval = interval
+        self._pending = {}  # chat_id -> game waiting to be written
+        self._scheduled = {}  # chat_id -> delayed flush task
+        self._locks = {}  # chat_id -> [asyncio.Lock around writes, users]
+        self._last_write = {}  # chat_id -> (monotonic time, game_state)
+
+    def mark_dirty(self, chat_id, game: SoccerGame) -> None:
+        """Record a change to the game in chat_id and schedule its write"""
+        game.version += 1
+        self._pending[chat_id] = game
+
+        written_at, written_state = self._last_write.get(chat_id, (0.0, None))
+        if game.game_state != written_state:
+            self._schedule(chat_id, 0)
+        elif chat_id not in self._scheduled:
+            delay = written_at + self.interval - time.monotonic()
+            self._schedule(chat_id, max(delay, 0))
+
+    async def flush(self, chat_id) -> None:
+        """Write the pending state of chat_id now"""
+        task = self._scheduled.pop(chat_id, None)
+        if task and task is not asyncio.current_task():
+            task.cancel()
+
+        async with self._locked(chat_id):
+            game = self._pending.pop(chat_id, None)
+            if game is None:
+                return
+
+            snapshot = game.to_snapshot()
+            self._last_write[chat_id] = (time.monotonic(), game.game_state)
+            await self.game_db_manager.aio.save_active_game(chat_id, snapshot)
+
+    async def flush_all(self) -> None:
+        """Write every pending game now, e.g. before the bot stops"""
+        for chat_id in list(self._pending):
+            await self.flush(chat_id)
+
+    async def discard(self, chat_id) -> None:
+        """
+        Drop anything pending for chat_id and wait for an in-flight write,
+        so the game can be deleted without being written back afterwards
+        """
+        task = self._scheduled.pop(chat_id, None)
+        if task:
+            task.cancel()
+        self._pending.pop(chat_id, None)
+        async with self._locked(chat_id):
+            self._last_write.pop(chat_id, None)
+
+    def _schedule(self, chat_id, delay: float) -> None:
+        task = self._scheduled.pop(chat_id, None)
+        if task:
+            task.cancel()
+        self._scheduled[chat_id] = asyncio.create_task(
+            self._flush_later(chat_id, delay)
+        )
+
+    async def _flush_later(self, chat_id, delay: float) -> None:
+        await asyncio.sleep(delay)
+        try:
+            await self.flush(chat_id)
+        except Exception as e:
+            print(f"Error saving active game for chat {chat_id}: {e}")
+
+    @asynccontextmanager
+    async def _locked(self, chat_id):
+        # The lock is dropped once nobody holds or waits for it, so chats
+        # that are done with don't keep one around
+        entry = self._locks.setdefault(chat_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[chat_id]
@@ -0,0 +1,277 @@
+from typing import Dict, Iterable, List
+import copy
+import itertools
+import logging
+import time
+
+from database.elo import EloDBManager
+from database.game import GameDBManager
+from database.player import PlayerDBManager
+from services.elo_replay import EloReplayEngine
+
+logger = logging.getLogger(__name__)
+
+HISTORICAL_IMPORT_CHAT_ID = 999999  # Special chat_id for historical games
+
+
+class HistoryImportPipeline:
+    """
+    Imports parsed historical games in bulk.
+
+    Games must arrive in chronological order (streaks and ratings are
+    replayed as they come); a game dated before one already imported is
+    reported as failed. For each batch the games and their participations
+    are inserted with one request each, while player stats and ELO ratings are computed in memory (same rules as
+    update_player_stats and process_game_ratings) and the touched players
+    are written back in one upsert, so importing a season costs a handful
+    of requests per batch instead of several per game.
+
+    Input games are the dicts produced by GameHistoryProcessor:
+    {"date", "score_a", "score_b", "team_a": [...], "team_b": [...]}
+    with players as {"player_id", "is_captain", "is_external"}.
+    """
+
+    def __init__(
+        self,
+        player_db_manager: PlayerDBManager,
+        game_db_manager: GameDBManager,
+        elo_db_manager: EloDBManager,
+        batch_size: int = 200,
+    ):
+        self.player_db_manager = player_db_manager
+        self.game_db_manager = game_db_manager
+        self.elo_db_manager = elo_db_manager
+        self.elo_engine = EloReplayEngine(elo_db_manager.config)
+        self.batch_size = batch_size
+
+    def run(self, games: Iterable[Dict], dry_run: bool = False) -> Dict:
+        """
+        Import games in order. With dry_run nothing is written, but stats and
+        ratings are still computed so the report shows what would change.
+        Games that can't be imported end up in results["failed"] without
+        leaving anything behind in the database.
+        """
+        started = time.perf_counter()
+        players = {p.id: p for p in self.player_db_manager.get_all_players()}
+        ratings = {player_id: p.elo_rating for player_id, p in players.items()}
+        touched = set()
+        last_date = None
+        results = {"saved": 0, "failed": [], "rating_changes": 0, "write_errors": 0}
+
+        games = iter(games)
+        while batch := list(itertools.islice(games, self.batch_size)):
+            batch, last_date = self._check_games(batch, last_date, results)
+
+            # Stats are computed on copies before anything is written, so a
+            # game that can't be scored never leaves a half-imported batch
+            staged, batch = self._stage_stats(players, batch, results)
+            saved = self._save_batch(batch, dry_run, results)
+            if not saved:
+                self._log_progress(results, started)
+                continue
+            if len(saved) != len(batch):
+                # Later games' streaks built on the ones that failed to save
+                staged, _ = self._stage_stats(
+                    players, [game for game, _ in saved], results
+                )
+
+            players.update(staged)
+            ratings, history, snapshots = self.elo_engine.replay_with_history(
+                [record for _, record in saved], ratings
+            )
+            for player_id in staged:
+                players[player_id].elo_rating = ratings[player_id]
+            touched |= staged.keys()
+            results["saved"] += len(saved)
+            results["rating_changes"] += len(history)
+
+            # Player aggregates are written per batch so an interrupted import
+            # leaves stats consistent with the games saved so far
+            if not dry_run:
+                self._write_batch(
+                    [players[player_id] for player_id in staged],
+                    history,
+                    snapshots,
+                    results,
+                )
+
+            self._log_progress(results, started)
+
+        results["players_updated"] = len(touched)
+        results["elapsed"] = time.perf_counter() - started
+        self._log_progress(results, started, final=True, dry_run=dry_run)
+        return results
+
+    def _check_games(self, batch: List[Dict], last_date, results: Dict):
+        """
+        Move games missing data needed for the import, or dated before the
+        last importable game, to results["failed"].
+        Returns (importable games, date of the last one).
+        """
+        importable = []
+        for game in batch:
+            issues = []
+            if not game.get("date"):
+                issues.append("missing date")
+            elif last_date and game["date"] < last_date:
+                issues.append(f"out of order, after a game from {last_date}")
+            if game.get("score_a") is None or game.get("score_b") is None:
+                issues.append("missing score")
+            if not game.get("team_a") or not game.get("team_b"):
+                issues.append("a team has no players")
+
+            if issues:
+                logger.error(
+                    f"Skipping game from {game.get('date')}: {', '.join(issues)}"
+                )
+                results["failed"].append(game)
+            else:
+                importable.append(game)
+                last_date = game["date"]
+        return importable, last_date
+
+    def _stage_stats(self, players: Dict, games: List[Dict], results: Dict):
+        """
+        Apply the games' results to copies of the players involved.
+        Returns ({player_id: updated copy}, games that could be applied);
+        the others are added to results["failed"].
+        """
+        staged = {}
+        applied = []
+        for game in games:
+            game_stats = {}
+            try:
+                for participation in self._participations(game, None):
+                    player_id = participation["player_id"]
+                    player = staged.get(player_id) or players.get(player_id)
+                    if not player:
+                        logger.warning(f"Unknown player {player_id}")
+                        continue
+                    game_stats[player_id] = (
+                        self.player_db_manager._calculate_player_stats(
+                            player, participation, game["score_a"], game["score_b"]
+                        )
+                    )
+            except Exception as e:
+                logger.error(f"Error scoring game from {game['date']}: {e}")
+                results["failed"].append(game)
+                continue
+
+            for player_id, new_stats in game_stats.items():
+                player = staged.get(player_id) or copy.copy(players[player_id])
+                for field, value in new_stats.items():
+                    setattr(player, field, value)
+                staged[player_id] = player
+            applied.append(game)
+        return staged, applied
+
+    def _save_batch(self, batch: List[Dict], dry_run: bool, results: Dict):
+        """
+        Insert a batch of games and their participations.
+        Returns (game, `games` row with embedded game_players) pairs for the
+        games saved completely. Games whose participations failed are deleted
+        again and added to results["failed"].
+        """
+        if not batch:
+            return []
+
+        games_data = [
+            {
+                "chat_id": str(HISTORICAL_IMPORT_CHAT_ID),
+                "score_team_a": game["score_a"],
+                "score_team_b": game["score_b"],
+                "team_a_external_count": self._external_count(game["team_a"]),
+                "team_b_external_count": self._external_count(game["team_b"]),
+                "played_at": game["date"],
+            }
+            for game in batch
+        ]
+
+        if dry_run:
+            game_ids = [None] * len(batch)
+        else:
+            try:
+                game_ids = self.game_db_manager.insert_games(games_data)
+            except Exception as e:
+                logger.error(f"Error saving batch of {len(batch)} games: {e}")
+                results["failed"].extend(batch)
+                return []
+
+        saved = []
+        participations = []
+        for game, game_data, game_id in zip(batch, games_data, game_ids):
+            game_players = self._participations(game, game_id)
+            participations.extend(game_players)
+            saved.append((game, dict(game_data, id=game_id, game_players=game_players)))
+
+        if dry_run:
+            return saved
+
+        failed_rows = self.game_db_manager.insert_participations(participations)
+        failed_game_ids = {row["game_id"] for row in failed_rows}
+        if not failed_game_ids:
+            return saved
+
+        for game, record in saved:
+            if record["id"] in failed_game_ids:
+                logger.error(f"Participations missing for game from {game['date']}")
+                results["failed"].append(game)
+        try:
+            self.game_db_manager.delete_games(list(failed_game_ids))
+        except Exception as e:
+            logger.error(f"Error removing incomplete games {failed_game_ids}: {e}")
+        return [
+            (game, record)
+            for game, record in saved
+            if record["id"] not in failed_game_ids
+        ]
+
+    def _write_batch(self, players: List, history: List, snapshots: List, results):
+        """Write a batch's player aggregates and rating history, logging failures"""
+        for description, write, rows in [
+            ("player stats", self.player_db_manager.upsert_players, players),
+            ("rating history", self.elo_db_manager.write_rating_history, history),
+            ("rating snapshots", self.elo_db_manager.write_snapshots, snapshots),
+        ]:
+            try:
+                write(rows)
+            except Exception as e:
+                logger.error(f"Error writing {description} for batch: {e}")
+                results["write_errors"] += 1
+
+    @staticmethod
+    def _participations(game: Dict, game_id) -> List[Dict]:
+        """game_players rows of a parsed game, registered players only"""
+        return [
+            {
+                "game_id": game_id,
+                "player_id": player["player_id"],
+                "team": team_letter,
+                "was_captain": player["is_captain"],
+                "was_mvp": False,  # MVP data not available in historical data
+            }
+            for team, team_letter in [(game["team_a"], "A"), (game["team_b"], "B")]
+            for player in team
+            if player["player_id"] > 0  # Only include registered players
+        ]
+
+    @staticmethod
+    def _external_count(team: List[Dict]) -> int:
+        return len([p for p in team if p["player_id"] < 0])
+
+    @staticmethod
+    def _log_progress(results, started, final=False, dry_run=False):
+        done = results["saved"] + len(results["failed"])
+        elapsed = time.perf_counter() - started
+        rate = done / elapsed if elapsed else 0
+        prefix = (
+            "Dry run finished"
+            if final and dry_run
+            else "Import finished" if final else "Progress"
+        )
+        logger.info(
+            f"{prefix}: {done} games ({len(results['failed'])} failed), "
+            f"{results['rating_changes']} rating changes, "
+            f"{results['write_errors']} write errors, "
+            f"{elapsed:.1f}s, {rate:.0f} games/s"
+        )
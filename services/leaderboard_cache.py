@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+
+class LeaderboardCache:
+    """
+    Ranked leaderboard rows and their formatted message, kept in memory.
+    Ratings only change when a game is scored or its voting completes, so
+    those paths call invalidate() and every /leaderboard in between is served
+    without a query. Concurrent requests after an invalidation share a single
+    refresh; a refresh that overlaps an invalidation isn't cached. `ttl`
+    bounds staleness from changes made outside the bot (migration and replay
+    scripts).
+    """
+
+    def __init__(self, player_db_manager, min_games=5, size=5, ttl: float = 600):
+        self.player_db_manager = player_db_manager
+        self.min_games = min_games
+        self.size = size
+        self.ttl = ttl
+        self.players = []
+        self.text = None
+        self._expires_at = 0.0
+        self._generation = 0  # bumped by every invalidate()
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._expires_at = 0.0
+
+    async def get_text(self) -> str:
+        """Formatted leaderboard, refreshed from the database when stale"""
+        if self._expires_at < time.monotonic():
+            async with self._lock:
+                # Another request may have refreshed it while we waited
+                if self._expires_at < time.monotonic():
+                    return await self._refresh()
+        return self.text
+
+    async def _refresh(self) -> str:
+        generation = self._generation
+        players = await self.player_db_manager.aio.get_leaderboard(
+            min_games=self.min_games, limit=self.size
+        )
+        text = self.format(players)
+        # The query may have run before the invalidating write, so the result
+        # is only cached if nothing was invalidated in the meantime
+        if self._generation == generation:
+            self.players = players
+            self.text = text
+            self._expires_at = time.monotonic() + self.ttl
+        return text
+
+    @staticmethod
+    def format(players) -> str:
+        if not players:
+            return "No players with enough games yet! Play more to appear on the leaderboard."
+
+        # Create leaderboard message
+        message = "🏆 ELO Rating Leaderboard 🏆\n\n"
+
+        for i, player in enumerate(players, 1):
+            # Calculate win rate
+            win_rate = (
+                (player.games_won / player.games_played * 100)
+                if player.games_played > 0
+                else 0
+            )
+
+            # Add medal emoji for top 3
+            medal = {1: "🥇", 2: "🥈", 3: "🥉"}.get(i, "👤")
+
+            # Format player stats
+            message += (
+                f"{medal} {i}. {player.display_name}\n"
+                f"   • ELO: {player.elo_rating}\n"
+                f"   • Win Rate: {win_rate:.1f}%\n"
+                f"   • W/L/D: {player.games_won}/{player.games_lost}/{player.games_drawn}\n"
+            )
+
+        return message
@@ -0,0 +1,210 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from services.rate_limiter import TokenBucket
+
+# Priority lanes, lower is served first. Without `rate_limit_args` a request's
+# lane follows its chat type; the MVP voting flow names its lanes explicitly
+# (context.bot.send_message(..., rate_limit_args=PRIORITY_PRIVATE)).
+# Callback answers skip the queue altogether.
+PRIORITY_GROUP = 1  # messages, edits and deletes in group chats
+PRIORITY_PRIVATE = 2  # ballots and notifications in private chats
+
+# editMessageText etc. for the same message: only the latest one is sent
+MERGEABLE_ENDPOINTS = {
+    "editMessageText",
+    "editMessageReplyMarkup",
+    "editMessageCaption",
+}
+
+
+class PriorityGate:
+    """TokenBucket whose waiters are served by priority, then arrival order"""
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self._waiting = []  # heap of (priority, seq)
+        self._counter = itertools.count()
+        self._changed = asyncio.Condition()
+
+    async def acquire(self, priority: int) -> None:
+        entry = (priority, next(self._counter))
+        heapq.heappush(self._waiting, entry)
+        try:
+            async with self._changed:
+                await self._changed.wait_for(lambda: self._waiting[0] == entry)
+            await self.bucket.acquire()
+        finally:
+            self._waiting.remove(entry)
+            heapq.heapify(self._waiting)
+            async with self._changed:
+                self._changed.notify_all()
+
+
+class _Edit:
+    """A queued edit of one message, possibly replaced by a newer one"""
+
+    __slots__ = ("result", "waiter", "superseded_by")
+
+    def __init__(self):
+        self.result = asyncio.get_running_loop().create_future()
+        self.waiter = None
+        self.superseded_by = None
+
+
+class OutboundScheduler(BaseRateLimiter):
+    """
+    Central queue for every request the bot makes to Telegram.
+    Plugged into the Application as its rate limiter, so all send, edit and
+    delete calls go through it, whether they come from context.bot,
+    reply_text or query.message.
+    - a global bucket keeps the bot under ~30 requests/s, serving group
+      traffic before private messages; callback answers are sent straight
+      away
+    - every chat has its own bucket: ~20 messages/minute in groups, about
+      one per second in private chats
+    - a RetryAfter pauses the chat it was raised for, and the request is
+      retried once the wait is over
+    - an edit of a message that is still queued replaces the queued edit of
+      the same kind; both callers get the result of the single request that
+      is actually sent
+    - buckets of chats that have gone quiet are dropped every
+      `prune_interval` seconds
+    """
+
+    def __init__(
+        self,
+        global_rate: float = 30,
+        group_rate_per_minute: float = 20,
+        group_burst: float = 5,
+        private_rate: float = 1,
+        max_retries: int = 3,
+        prune_interval: float = 300,
+    ):
+        self.global_gate = PriorityGate(TokenBucket(rate=global_rate))
+        self.group_rate = group_rate_per_minute / 60
+        self.group_burst = group_burst
+        self.private_rate = private_rate
+        self.max_retries = max_retries
+        self.prune_interval = prune_interval
+        self._chat_buckets = {}  # chat_id -> TokenBucket
+        self._paused_until = {}  # chat_id -> monotonic time after a RetryAfter
+        # (endpoint, chat_id, message_id) -> latest queued _Edit
+        self._pending_edits = {}
+        self._next_prune = time.monotonic() + prune_interval
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def process_request(
+        self, callback, args, kwargs, endpoint, data, rate_limit_args
+    ):
+        chat_id = data.get("chat_id")
+        if endpoint == "answerCallbackQuery" or chat_id is None:
+            # Not a chat message (callback answers, getMe, setWebhook, ...)
+            return await callback(*args, **kwargs)
+
+        priority = rate_limit_args
+        if priority is None:
+            priority = PRIORITY_GROUP if self._is_group(chat_id) else PRIORITY_PRIVATE
+
+        if endpoint in MERGEABLE_ENDPOINTS and data.get("message_id"):
+            return await self._process_edit(
+                (endpoint, chat_id, data["message_id"]),
+                chat_id,
+                priority,
+                callback,
+                args,
+                kwargs,
+            )
+
+        await self._acquire(chat_id, priority)
+        return await self._call(chat_id, callback, args, kwargs)
+
+    async def _process_edit(self, key, chat_id, priority, callback, args, kwargs):
+        edit = _Edit()
+        previous = self._pending_edits.get(key)
+        self._pending_edits[key] = edit
+        if previous:
+            previous.superseded_by = edit
+            previous.waiter.cancel()
+
+        try:
+            edit.waiter = asyncio.ensure_future(self._acquire(chat_id, priority))
+            try:
+                await edit.waiter
+            except asyncio.CancelledError:
+                if edit.superseded_by is None:
+                    raise
+                result = await asyncio.shield(edit.superseded_by.result)
+            else:
+                if self._pending_edits.get(key) is edit:
+                    del self._pending_edits[key]
+                result = await self._call(chat_id, callback, args, kwargs)
+            edit.result.set_result(result)
+            return result
+        except BaseException as e:
+            if not edit.result.done():
+                edit.result.set_exception(e)
+                edit.result.exception()  # retrieved by whoever merged into it
+            if self._pending_edits.get(key) is edit:
+                del self._pending_edits[key]
+            raise
+
+    async def _acquire(self, chat_id, priority: int) -> None:
+        await self._chat_bucket(chat_id).acquire()
+        await self.global_gate.acquire(priority)
+
+    async def _call(self, chat_id, callback, args, kwargs):
+        for attempt in range(self.max_retries + 1):
+            paused_for = self._paused_until.get(chat_id, 0) - time.monotonic()
+            if paused_for > 0:
+                await asyncio.sleep(paused_for)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                if attempt == self.max_retries:
+                    raise
+                retry_after = e.retry_after
+                if not isinstance(retry_after, (int, float)):
+                    retry_after = retry_after.total_seconds()
+                print(f"Flood control in chat {chat_id}, retrying in {retry_after}s")
+                self._paused_until[chat_id] = time.monotonic() + retry_after + 0.1
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            self._prune()
+            if self._is_group(chat_id):
+                bucket = TokenBucket(rate=self.group_rate, capacity=self.group_burst)
+            else:
+                bucket = TokenBucket(rate=self.private_rate)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    def _prune(self) -> None:
+        """Forget chats whose bucket has refilled and whose pause is over"""
+        now = time.monotonic()
+        if now < self._next_prune:
+            return
+        self._next_prune = now + self.prune_interval
+
+        for chat_id, bucket in list(self._chat_buckets.items()):
+            if bucket.is_idle():
+                del self._chat_buckets[chat_id]
+        for chat_id, until in list(self._paused_until.items()):
+            if until < now:
+                del self._paused_until[chat_id]
+
+    @staticmethod
+    def _is_group(chat_id) -> bool:
+        # Groups and channels have negative ids, channels can also be @usernames
+        return isinstance(chat_id, str) or chat_id < 0
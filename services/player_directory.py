@@ -0,0 +1,67 @@
+from collections import OrderedDict
+import threading
+import time
+
+
+class PlayerDirectory:
+    """
+    In-memory directory of registered players (Telegram id -> display name).
+    Entries expire after `ttl` seconds and the least recently used ones are
+    evicted once the directory grows past `max_size`.
+    """
+
+    def __init__(self, ttl: float = 3600, max_size: int = 5000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # player_id -> (display_name, expires_at)
+        # Writes come from the database executor threads, reads from the event loop
+        self._lock = threading.Lock()
+
+    def get(self, player_id) -> str | None:
+        """Return the cached display name, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(player_id)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            display_name, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[player_id]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(player_id)
+            self.hits += 1
+            return display_name
+
+    def put(self, player_id, display_name: str) -> None:
+        """Add or refresh a single player"""
+        with self._lock:
+            self._store(player_id, display_name)
+
+    def load(self, players: dict) -> None:
+        """Bulk fill from a {player_id: display_name} mapping"""
+        with self._lock:
+            for player_id, display_name in players.items():
+                self._store(player_id, display_name)
+
+    def invalidate(self, player_id) -> None:
+        with self._lock:
+            self._entries.pop(player_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _store(self, player_id, display_name: str) -> None:
+        self._entries[player_id] = (display_name, time.monotonic() + self.ttl)
+        self._entries.move_to_end(player_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
@@ -0,0 +1,66 @@
+from collections import deque
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from handlers.callback_router import parse_callback_data
+
+
+class ChatSerializedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Processes updates from different chats concurrently (up to
+    max_concurrent_updates at once) while updates from the same chat run one
+    at a time, in arrival order, so handlers never race on that chat's
+    SoccerGame.
+    An update for a chat that is already being handled is queued and run by
+    the update holding the chat once it is done, so a burst in one chat uses
+    a single concurrency slot instead of filling them all while waiting.
+    MVP ballots are answered in private chats but change the group's game,
+    so vote callbacks are serialized with the group named in their data.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        self._chat_queues = {}  # chat key -> deque of coroutines waiting to run
+
+    async def do_process_update(self, update, coroutine) -> None:
+        key = self.chat_key(update)
+        if key is None:
+            await coroutine
+            return
+
+        queue = self._chat_queues.get(key)
+        if queue is not None:
+            queue.append(coroutine)
+            return
+
+        queue = self._chat_queues[key] = deque([coroutine])
+        try:
+            while queue:
+                # Application.process_update reports handler errors itself
+                await queue.popleft()
+        finally:
+            del self._chat_queues[key]
+            for waiting in queue:
+                waiting.close()
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    @staticmethod
+    def chat_key(update):
+        """The chat whose game an update can change, None if it has no chat"""
+        if not isinstance(update, Update):
+            return None
+
+        query = update.callback_query
+        if query and query.data and query.data.startswith("vote_"):
+            args = parse_callback_data(query.data).args
+            if len(args) == 2:
+                return args[0]
+
+        chat = update.effective_chat
+        return chat.id if chat else None
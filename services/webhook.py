@@ -0,0 +1,73 @@
+import hmac
+import json
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """
+    aiohttp endpoint receiving updates pushed by Telegram.
+    Requests without the secret token set in setWebhook are rejected. Valid
+    updates are queued on the Application and acknowledged straight away;
+    the Application processes them concurrently (see concurrent_updates).
+    """
+
+    def __init__(
+        self,
+        app: Application,
+        secret_token: str,
+        host: str = "0.0.0.0",
+        port: int = 8443,
+        path: str = "/telegram",
+    ):
+        if not secret_token:
+            raise ValueError("A webhook secret token is required")
+        self.app = app
+        self.secret_token = secret_token
+        self._secret = secret_token.encode()
+        self.host = host
+        self.port = port
+        self.path = path
+        self._runner = None
+
+    async def start(self) -> None:
+        server = web.Application()
+        server.router.add_post(self.path, self.handle_update)
+        self._runner = web.AppRunner(server, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        print(f"Listening for updates on http://{self.host}:{self.port}{self.path}")
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        # compare_digest only accepts ASCII str; aiohttp decodes header bytes
+        # it can't read as UTF-8 with surrogateescape, so encode them back
+        token = request.headers.get(SECRET_HEADER, "").encode(errors="surrogateescape")
+        if not hmac.compare_digest(token, self._secret):
+            return web.Response(status=403)
+
+        try:
+            payload = await request.json()
+            if not isinstance(payload, dict):
+                raise ValueError(f"expected an object, got {type(payload).__name__}")
+            update = Update.de_json(payload, self.app.bot)
+        except (
+            json.JSONDecodeError,
+            AttributeError,
+            KeyError,
+            TypeError,
+            ValueError,
+        ) as e:
+            print(f"Invalid update received: {e}")
+            return web.Response(status=400)
+
+        await self.app.update_queue.put(update)
+        return web.Response()